@@ -1,29 +1,33 @@
 """
 Ejemplo 1: Búsqueda simple por texto
 """
+import sys
 from src.elasticsearch_client import ElasticsearchClient
 from src.query_builder import QueryBuilder
 
-# Conectar
-es_client = ElasticsearchClient()
-es_client.connect()
-query = QueryBuilder(es_client.get_client())
+# Cliente compartido (reutiliza conexiones y sesión TLS)
+client = ElasticsearchClient.instance().get_client()
+query = QueryBuilder(client)
 
 # Buscar documentos que contengan "dragón"
-results = query.match_query("texto", "dragón")
+results = query.match_query("texto", "dragón",
+                            source_fields=["autor", "tipo_documento"],
+                            preview=True)
 
-print(f"\n{'='*60}")
-print(f"BÚSQUEDA: 'dragón'")
-print(f"{'='*60}")
-print(f"Encontrados: {len(results)} documentos\n")
+# Construir la salida completa y escribirla de una vez
+lineas = [
+    f"\n{'='*60}",
+    "BÚSQUEDA: 'dragón'",
+    f"{'='*60}",
+    f"Encontrados: {len(results)} documentos\n",
+]
 
 for i, r in enumerate(results, 1):
     data = r['data']
     score = r.get('score', 0)
-    print(f"{i}. Score: {score:.2f}")
-    print(f"   Autor: {data['autor']}")
-    print(f"   Tipo: {data['tipo_documento']}")
-    print(f"   Texto: {data['texto'][:100]}...")
-    print()
+    lineas.append(f"{i}. Score: {score:.2f}")
+    lineas.append(f"   Autor: {data['autor']}")
+    lineas.append(f"   Tipo: {data['tipo_documento']}")
+    lineas.append(f"   Texto: {QueryBuilder.preview_text(r)}\n")
 
-es_client.disconnect()
+sys.stdout.write("\n".join(lineas) + "\n")
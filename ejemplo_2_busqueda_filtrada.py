@@ -1,29 +1,33 @@
 """
 Ejemplo 2: Búsqueda por tipo y fecha
 """
+import sys
 from src.elasticsearch_client import ElasticsearchClient
 from src.query_builder import QueryBuilder
 
-# Conectar
-es_client = ElasticsearchClient()
-es_client.connect()
-query = QueryBuilder(es_client.get_client())
+# Cliente compartido (reutiliza conexiones y sesión TLS)
+client = ElasticsearchClient.instance().get_client()
+query = QueryBuilder(client)
 
 # Buscar cuentos de terror después de julio 2024
 results = query.bool_query(
     must=[{"term": {"tipo_documento": "terror"}}],
-    filter_terms=[{"range": {"fecha": {"gte": "2024-07-01"}}}]
+    filter_terms=[{"range": {"fecha": {"gte": "2024-07-01"}}}],
+    source_fields=["autor", "fecha"],
+    preview=True
 )
 
-print(f"\n{'='*60}")
-print(f"BÚSQUEDA: Cuentos de TERROR desde Julio 2024")
-print(f"{'='*60}")
-print(f"Encontrados: {len(results)} documentos\n")
+# Construir la salida completa y escribirla de una vez
+lineas = [
+    f"\n{'='*60}",
+    "BÚSQUEDA: Cuentos de TERROR desde Julio 2024",
+    f"{'='*60}",
+    f"Encontrados: {len(results)} documentos\n",
+]
 
 for i, r in enumerate(results, 1):
     data = r['data']
-    print(f"{i}. {data['autor']} ({data['fecha']})")
-    print(f"   {data['texto'][:150]}...")
-    print()
+    lineas.append(f"{i}. {data['autor']} ({data['fecha']})")
+    lineas.append(f"   {QueryBuilder.preview_text(r)}\n")
 
-es_client.disconnect()
+sys.stdout.write("\n".join(lineas) + "\n")
@@ -1,35 +1,35 @@
 """
 Ejemplo 3: Estadísticas de documentos
 """
+import sys
 from src.elasticsearch_client import ElasticsearchClient
 from src.query_builder import QueryBuilder
 from src.document_indexer import DocumentIndexer
 
-# Conectar
-es_client = ElasticsearchClient()
-es_client.connect()
+# Cliente compartido (reutiliza conexiones y sesión TLS)
+client = ElasticsearchClient.instance().get_client()
 
 # Obtener estadísticas
-indexer = DocumentIndexer(es_client.get_client())
+indexer = DocumentIndexer(client)
 total = indexer.count_documents()
 
-query = QueryBuilder(es_client.get_client())
+query = QueryBuilder(client)
 stats = query.aggregation_query("tipo_documento")
 
-print(f"\n{'='*60}")
-print(f"ESTADÍSTICAS DEL ÍNDICE")
-print(f"{'='*60}")
-print(f"\nTotal de documentos: {total}")
-print(f"\nDistribución por tipo:")
-print("-" * 40)
+# Construir la salida completa y escribirla de una vez
+lineas = [
+    f"\n{'='*60}",
+    "ESTADÍSTICAS DEL ÍNDICE",
+    f"{'='*60}",
+    f"\nTotal de documentos: {total}",
+    "\nDistribución por tipo:",
+    "-" * 40,
+]
 
+escala = 100 / total if total > 0 else 0
 for item in stats:
-    tipo = item['key']
-    count = item['count']
-    porcentaje = (count / total * 100) if total > 0 else 0
+    porcentaje = item['count'] * escala
     barra = "█" * int(porcentaje / 5)
-    print(f"{tipo:15} {barra} {count:2} ({porcentaje:.1f}%)")
+    lineas.append(f"{item['key']:15} {barra} {item['count']:2} ({porcentaje:.1f}%)")
 
-print()
-
-es_client.disconnect()
+sys.stdout.write("\n".join(lineas) + "\n\n")
@@ -0,0 +1,43 @@
+"""
+Ejemplo 4: Dashboard (resultados + facetas + rango en una sola petición)
+"""
+import sys
+from src.elasticsearch_client import ElasticsearchClient
+from src.query_builder import QueryBuilder
+
+# Cliente compartido (reutiliza conexiones y sesión TLS)
+client = ElasticsearchClient.instance().get_client()
+query = QueryBuilder(client)
+
+# Las tres consultas del dashboard viajan juntas en un único _msearch
+resultados, por_tipo, recientes = query.msearch([
+    QueryBuilder.match_body("texto", "reino mágico",
+                            source_fields=["autor", "tipo_documento"],
+                            preview=True),
+    QueryBuilder.aggregation_body("tipo_documento", "por_tipo"),
+    QueryBuilder.range_body("fecha", gte="2024-07-01",
+                            source_fields=["autor", "fecha"]),
+])
+
+# Construir la salida completa y escribirla de una vez
+lineas = [
+    f"\n{'='*60}",
+    "DASHBOARD: 'reino mágico'",
+    f"{'='*60}",
+    f"\nResultados ({len(resultados)}):",
+]
+
+for i, r in enumerate(resultados, 1):
+    data = r['data']
+    lineas.append(f"{i}. [{r['score']:.2f}] {data['autor']} ({data['tipo_documento']})")
+    lineas.append(f"   {QueryBuilder.preview_text(r)}")
+
+lineas.append("\nFacetas por tipo:")
+for item in por_tipo:
+    lineas.append(f"  • {item['key']}: {item['count']}")
+
+lineas.append("\nPublicados desde julio 2024:")
+for r in recientes:
+    lineas.append(f"  • {r['data']['fecha']} - {r['data']['autor']}")
+
+sys.stdout.write("\n".join(lineas) + "\n\n")
@@ -0,0 +1,78 @@
+"""
+Ejemplos 1, 2 y 3 en un solo proceso
+Ejecuta las tres consultas de forma concurrente con AsyncQueryBuilder,
+compartiendo una única conexión. Los scripts ejemplo_*.py se mantienen
+como versiones individuales (mismas consultas, misma salida).
+"""
+import asyncio
+from typing import List
+from src.async_query_builder import AsyncQueryBuilder
+from src.elasticsearch_client import AsyncElasticsearchClient
+from src.query_builder import QueryBuilder
+
+SEPARATOR = "=" * 60
+
+
+async def run1(query: AsyncQueryBuilder) -> List[str]:
+    """Ejemplo 1: búsqueda simple por texto."""
+    results = await query.match_query("texto", "dragón",
+                                      source_fields=["autor", "tipo_documento"],
+                                      preview=True)
+
+    lines = [SEPARATOR, "BÚSQUEDA: 'dragón'", SEPARATOR, f"Encontrados: {len(results)} documentos\n"]
+    for i, r in enumerate(results, 1):
+        data = r['data']
+        lines.append(f"{i}. Score: {r.get('score', 0):.2f}")
+        lines.append(f"   Autor: {data['autor']}")
+        lines.append(f"   Tipo: {data['tipo_documento']}")
+        lines.append(f"   Texto: {QueryBuilder.preview_text(r)}\n")
+    return lines
+
+
+async def run2(query: AsyncQueryBuilder) -> List[str]:
+    """Ejemplo 2: búsqueda por tipo y fecha."""
+    results = await query.bool_query(
+        must=[{"term": {"tipo_documento": "terror"}}],
+        filter_terms=[{"range": {"fecha": {"gte": "2024-07-01"}}}],
+        source_fields=["autor", "fecha"],
+        preview=True
+    )
+
+    lines = [SEPARATOR, "BÚSQUEDA: Cuentos de TERROR desde Julio 2024", SEPARATOR,
+             f"Encontrados: {len(results)} documentos\n"]
+    for i, r in enumerate(results, 1):
+        data = r['data']
+        lines.append(f"{i}. {data['autor']} ({data['fecha']})")
+        lines.append(f"   {QueryBuilder.preview_text(r)}\n")
+    return lines
+
+
+async def run3(query: AsyncQueryBuilder) -> List[str]:
+    """Ejemplo 3: estadísticas del índice (conteo y agregación concurrentes)."""
+    count, stats = await query.run_many([
+        query.es.count(index=query.index_name),
+        query.aggregation_query("tipo_documento")
+    ])
+    total = count['count']
+
+    lines = [SEPARATOR, "ESTADÍSTICAS DEL ÍNDICE", SEPARATOR,
+             f"\nTotal de documentos: {total}", "\nDistribución por tipo:", "-" * 40]
+    escala = 100 / total if total > 0 else 0
+    for item in stats:
+        porcentaje = item['count'] * escala
+        barra = "█" * int(porcentaje / 5)
+        lines.append(f"{item['key']:15} {barra} {item['count']:2} ({porcentaje:.1f}%)")
+    return lines
+
+
+async def main() -> None:
+    """Lanza los tres ejemplos en paralelo y los imprime en orden."""
+    async with AsyncElasticsearchClient() as es_client:
+        query = AsyncQueryBuilder(es_client.get_client())
+        results = await query.run_many([run1(query), run2(query), run3(query)])
+
+    print("\n" + "\n\n".join("\n".join(lines) for lines in results) + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
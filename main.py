@@ -2,7 +2,8 @@
 Archivo principal del proyecto Elasticsearch
 Demuestra todas las funcionalidades implementadas.
 """
-from typing import List, Dict, Any
+import sys
+from typing import List, Dict, Any, Optional, Tuple
 from src.elasticsearch_client import ElasticsearchClient
 from src.index_manager import IndexManager
 from src.document_indexer import DocumentIndexer
@@ -17,6 +18,95 @@ SEPARATOR_WIDTH = 70
 MAX_TEXT_PREVIEW = 100
 
 
+# Datos de ejemplo (constantes: se construyen una sola vez al importar).
+# Son de solo lectura; copia un documento antes de modificarlo.
+_SAMPLE_DATA: Tuple[Dict[str, Any], ...] = (
+    {
+        "autor": "Maria Gonzalez",
+        "tipo_documento": "infantil",
+        "texto": "Había una vez un pequeño dragón llamado Spark que vivía en un bosque encantado. "
+                 "Todos los días exploraba el reino mágico buscando aventuras y nuevos amigos.",
+        "fecha": "2024-04-10"
+    },
+    {
+        "autor": "Carlos Ruiz",
+        "tipo_documento": "terror",
+        "texto": "La casa de la colina abandonada era el lugar más terrorífico de la zona. "
+                 "Nadie se atrevía a acercarse después del anochecer, pues extraños sonidos "
+                 "resonaban desde su interior.",
+        "fecha": "2024-07-01"
+    },
+    {
+        "autor": "Ana Martinez",
+        "tipo_documento": "fantastico",
+        "texto": "En el reino de las estrellas, donde la magia fluye como ríos de luz, "
+                 "vivía una hechicera capaz de controlar el tiempo y el espacio.",
+        "fecha": "2024-05-15"
+    },
+    {
+        "autor": "Pedro Lopez",
+        "tipo_documento": "infantil",
+        "texto": "Los animales del bosque organizaron una gran fiesta para celebrar la llegada "
+                 "de la primavera. El oso, el conejo y el zorro bailaban bajo los árboles.",
+        "fecha": "2024-03-20"
+    },
+    {
+        "autor": "Laura Sanchez",
+        "tipo_documento": "terror",
+        "texto": "El reloj de la torre marcaba las doce cuando las sombras comenzaron a moverse. "
+                 "Un escalofrío recorrió mi espalda mientras escuchaba pasos acercándose.",
+        "fecha": "2024-08-12"
+    },
+    {
+        "autor": "Miguel Torres",
+        "tipo_documento": "fantastico",
+        "texto": "El dragón guardián del reino había despertado después de mil años. "
+                 "Su rugido resonó por toda la tierra, anunciando el retorno de la magia antigua.",
+        "fecha": "2024-06-30"
+    },
+    {
+        "autor": "Sofia Ramirez",
+        "tipo_documento": "politico",
+        "texto": "El reino enfrentaba una crisis sin precedentes. Los consejeros debatían "
+                 "sobre las nuevas leyes mientras el pueblo esperaba decisiones justas.",
+        "fecha": "2024-09-05"
+    },
+    {
+        "autor": "Diego Morales",
+        "tipo_documento": "politico",
+        "texto": "La asamblea del reino se reunió para discutir el tratado de paz con las "
+                 "tierras vecinas. Era un momento crucial para la diplomacia.",
+        "fecha": "2024-10-18"
+    },
+    {
+        "autor": "Elena Vargas",
+        "tipo_documento": "infantil",
+        "texto": "La pequeña hada Lucía aprendió a volar por primera vez. Con sus alas "
+                 "brillantes recorrió todo el jardín encantado lleno de flores mágicas.",
+        "fecha": "2024-04-25"
+    },
+    {
+        "autor": "Roberto Diaz",
+        "tipo_documento": "fantastico",
+        "texto": "En las profundidades del océano mágico existía un reino de sirenas y criaturas "
+                 "luminosas. Sus castillos de coral brillaban con luz propia.",
+        "fecha": "2024-07-22"
+    }
+)
+
+
+# Consultas que se precalientan tras cada carga (las de filtro y agregación,
+# que son las que sirve la shard request cache)
+_WARMUP_SEARCHES: Tuple[Dict[str, Any], ...] = (
+    QueryBuilder.aggregation_body("tipo_documento", "cuentos_por_tipo"),
+    QueryBuilder.term_body("tipo_documento", "terror"),
+)
+
+
+# Cuerpo NDJSON de _bulk con los datos de ejemplo (se serializa en el primer uso)
+_CACHED_BULK_BYTES: Optional[bytes] = None
+
+
 def print_separator(title: str = "") -> None:
     """Imprime un separador visual."""
     print("\n" + "="*SEPARATOR_WIDTH)
@@ -34,105 +124,59 @@ def print_results(results: List[Dict[str, Any]], title: str = "Resultados") -> N
         results: Lista de resultados
         title: Título a mostrar
     """
-    print(f"\n{title}:")
-    print("-" * SEPARATOR_WIDTH)
+    # Acumular las líneas y escribirlas de una sola vez
+    buf: List[str] = [f"\n{title}:", "-" * SEPARATOR_WIDTH]
     
     if not results:
-        print("  No se encontraron resultados")
-        return
+        buf.append("  No se encontraron resultados")
     
     for i, result in enumerate(results, 1):
-        print(f"\n{i}. ID: {result['id']}")
+        buf.append(f"\n{i}. ID: {result['id']}")
         
         if 'score' in result:
-            print(f"   Score: {result['score']:.2f}")
+            buf.append(f"   Score: {result['score']:.2f}")
         
         data = result['data']
-        print(f"   Autor: {data.get('autor', 'N/A')}")
-        print(f"   Tipo: {data.get('tipo_documento', 'N/A')}")
-        print(f"   Fecha: {data.get('fecha', 'N/A')}")
+        buf.append(f"   Autor: {data.get('autor', 'N/A')}")
+        buf.append(f"   Tipo: {data.get('tipo_documento', 'N/A')}")
+        buf.append(f"   Fecha: {data.get('fecha', 'N/A')}")
         
-        if 'texto' in data:
+        # Preferir la vista previa generada por Elasticsearch (highlight)
+        preview = QueryBuilder.preview_text(result)
+        if preview:
+            buf.append(f"   Texto: {preview}")
+        elif 'texto' in data:
             texto = data['texto']
             texto_preview = texto[:MAX_TEXT_PREVIEW] + "..." if len(texto) > MAX_TEXT_PREVIEW else texto
-            print(f"   Texto: {texto_preview}")
+            buf.append(f"   Texto: {texto_preview}")
+    
+    sys.stdout.write("\n".join(buf) + "\n")
 
 
-def get_sample_data() -> List[Dict[str, Any]]:
-    """Obtiene los datos de ejemplo para indexación."""
-    return [
-        {
-            "autor": "Maria Gonzalez",
-            "tipo_documento": "infantil",
-            "texto": "Había una vez un pequeño dragón llamado Spark que vivía en un bosque encantado. "
-                     "Todos los días exploraba el reino mágico buscando aventuras y nuevos amigos.",
-            "fecha": "2024-04-10"
-        },
-        {
-            "autor": "Carlos Ruiz",
-            "tipo_documento": "terror",
-            "texto": "La casa de la colina abandonada era el lugar más terrorífico de la zona. "
-                     "Nadie se atrevía a acercarse después del anochecer, pues extraños sonidos "
-                     "resonaban desde su interior.",
-            "fecha": "2024-07-01"
-        },
-        {
-            "autor": "Ana Martinez",
-            "tipo_documento": "fantastico",
-            "texto": "En el reino de las estrellas, donde la magia fluye como ríos de luz, "
-                     "vivía una hechicera capaz de controlar el tiempo y el espacio.",
-            "fecha": "2024-05-15"
-        },
-        {
-            "autor": "Pedro Lopez",
-            "tipo_documento": "infantil",
-            "texto": "Los animales del bosque organizaron una gran fiesta para celebrar la llegada "
-                     "de la primavera. El oso, el conejo y el zorro bailaban bajo los árboles.",
-            "fecha": "2024-03-20"
-        },
-        {
-            "autor": "Laura Sanchez",
-            "tipo_documento": "terror",
-            "texto": "El reloj de la torre marcaba las doce cuando las sombras comenzaron a moverse. "
-                     "Un escalofrío recorrió mi espalda mientras escuchaba pasos acercándose.",
-            "fecha": "2024-08-12"
-        },
-        {
-            "autor": "Miguel Torres",
-            "tipo_documento": "fantastico",
-            "texto": "El dragón guardián del reino había despertado después de mil años. "
-                     "Su rugido resonó por toda la tierra, anunciando el retorno de la magia antigua.",
-            "fecha": "2024-06-30"
-        },
-        {
-            "autor": "Sofia Ramirez",
-            "tipo_documento": "politico",
-            "texto": "El reino enfrentaba una crisis sin precedentes. Los consejeros debatían "
-                     "sobre las nuevas leyes mientras el pueblo esperaba decisiones justas.",
-            "fecha": "2024-09-05"
-        },
-        {
-            "autor": "Diego Morales",
-            "tipo_documento": "politico",
-            "texto": "La asamblea del reino se reunió para discutir el tratado de paz con las "
-                     "tierras vecinas. Era un momento crucial para la diplomacia.",
-            "fecha": "2024-10-18"
-        },
-        {
-            "autor": "Elena Vargas",
-            "tipo_documento": "infantil",
-            "texto": "La pequeña hada Lucía aprendió a volar por primera vez. Con sus alas "
-                     "brillantes recorrió todo el jardín encantado lleno de flores mágicas.",
-            "fecha": "2024-04-25"
-        },
-        {
-            "autor": "Roberto Diaz",
-            "tipo_documento": "fantastico",
-            "texto": "En las profundidades del océano mágico existía un reino de sirenas y criaturas "
-                     "luminosas. Sus castillos de coral brillaban con luz propia.",
-            "fecha": "2024-07-22"
-        }
-    ]
+def get_sample_data() -> Tuple[Dict[str, Any], ...]:
+    """Obtiene los datos de ejemplo para indexación (tupla compartida, de solo lectura)."""
+    return _SAMPLE_DATA
+
+
+def get_sample_bulk_body(indexer: DocumentIndexer) -> bytes:
+    """
+    Obtiene los datos de ejemplo como cuerpo NDJSON de _bulk (con caché).
+    
+    Los documentos se validan y serializan solo la primera vez; las siguientes
+    llamadas reutilizan los mismos bytes.
+    
+    Args:
+        indexer: Indexador usado para validar y serializar
+        
+    Returns:
+        bytes: Cuerpo listo para enviar con DocumentIndexer.index_ndjson
+    """
+    global _CACHED_BULK_BYTES
+    if _CACHED_BULK_BYTES is None:
+        cuentos = get_sample_data()
+        indexer.validate_documents(cuentos)
+        _CACHED_BULK_BYTES = indexer.build_ndjson(cuentos)
+    return _CACHED_BULK_BYTES
 
 
 def demo_conexion() -> ElasticsearchClient:
@@ -156,15 +200,21 @@ def demo_creacion_indice(es_client: ElasticsearchClient) -> IndexManager:
     return index_manager
 
 
-def demo_indexacion(es_client: ElasticsearchClient) -> DocumentIndexer:
+def demo_indexacion(es_client: ElasticsearchClient, query: QueryBuilder) -> DocumentIndexer:
     """Demuestra la indexación de documentos."""
     print_separator("3. INDEXACIÓN DE DOCUMENTOS")
     
     indexer = DocumentIndexer(es_client.get_client())
-    cuentos = get_sample_data()
     
-    # Indexar documentos
-    success, errors = indexer.index_bulk_documents(cuentos)
+    # Indexar documentos (el índice se acaba de recrear: se envía el NDJSON cacheado)
+    with indexer.bulk_mode(tune_settings=len(_SAMPLE_DATA) >= indexer.BULK_MODE_MIN_DOCS):
+        success, errors = indexer.index_ndjson(get_sample_bulk_body(indexer))
+    logger.info("✓ Documentos indexados: %d (errores: %d)", success, len(errors))
+    
+    # El índice ha cambiado: descartar resultados cacheados y, como se acaba de
+    # refrescar, calentar la request cache antes de las consultas
+    query.clear_cache()
+    query.warm(list(_WARMUP_SEARCHES))
     
     # Contar documentos
     indexer.count_documents()
@@ -172,62 +222,68 @@ def demo_indexacion(es_client: ElasticsearchClient) -> DocumentIndexer:
     return indexer
 
 
-def demo_consultas(es_client: ElasticsearchClient, index_manager: IndexManager) -> None:
+def demo_consultas(query: QueryBuilder) -> None:
     """Demuestra diferentes tipos de consultas."""
     print_separator("4. CONSULTAS Y BÚSQUEDAS")
     
-    query = QueryBuilder(es_client.get_client())
-    index_manager.refresh_index()
+    # Sin refresh explícito: bulk_mode() ya hizo el refresh al terminar la carga
+    
+    # Las 7 consultas viajan en una sola petición (_msearch)
+    (results_a, results_b, results_c, results_d,
+     results_e, results_f, results_g) = query.msearch([
+        QueryBuilder.match_all_body(size=5),
+        QueryBuilder.term_body("tipo_documento", "terror"),
+        QueryBuilder.match_body("texto", "dragón mágico reino",
+                                source_fields=["autor", "tipo_documento"],
+                                preview=True),
+        QueryBuilder.range_body("fecha",
+                                gte="2024-04-01",
+                                lte="2024-07-31",
+                                source_fields=["autor", "fecha", "tipo_documento"]),
+        QueryBuilder.bool_body(
+            must=[{"match": {"texto": "reino"}}],
+            filter_terms=[{"term": {"tipo_documento": "fantastico"}}],
+            source_fields=["autor", "tipo_documento"],
+            preview=True
+        ),
+        QueryBuilder.aggregation_body("tipo_documento", "cuentos_por_tipo"),
+        QueryBuilder.multi_match_body(
+            "Maria dragon",
+            ["autor", "texto"],
+            source_fields=["autor", "tipo_documento"]
+        ),
+    ])
     
     # A. Match All Query
     print("\n📋 A. MATCH ALL QUERY (Todos los documentos)")
-    results = query.match_all(size=5)
-    print_results(results[:3], "Primeros 3 documentos")
+    print_results(results_a[:3], "Primeros 3 documentos")
     
     # B. Term Query (Búsqueda exacta)
     print("\n📋 B. TERM QUERY (Búsqueda exacta)")
-    results = query.term_query("tipo_documento", "terror")
-    print_results(results, "Cuentos de terror")
+    print_results(results_b, "Cuentos de terror")
     
     # C. Match Query (Búsqueda dinámica con relevancia)
     print("\n📋 C. MATCH QUERY (Búsqueda con relevancia)")
-    results = query.match_query("texto", "dragón mágico reino", 
-                                source_fields=["autor", "tipo_documento"])
-    print_results(results, "Búsqueda: 'dragón mágico reino'")
+    print_results(results_c, "Búsqueda: 'dragón mágico reino'")
     
     # D. Range Query (Búsqueda por rango de fechas)
     print("\n📋 D. RANGE QUERY (Búsqueda por fecha)")
-    results = query.range_query("fecha", 
-                                gte="2024-04-01", 
-                                lte="2024-07-31",
-                                source_fields=["autor", "fecha", "tipo_documento"])
-    print_results(results, "Cuentos entre Abril y Julio 2024")
+    print_results(results_d, "Cuentos entre Abril y Julio 2024")
     
     # E. Bool Query (Búsqueda compuesta)
     print("\n📋 E. BOOL QUERY (Búsqueda compuesta)")
-    results = query.bool_query(
-        must=[{"match": {"texto": "reino"}}],
-        filter_terms=[{"term": {"tipo_documento": "fantastico"}}],
-        source_fields=["autor", "tipo_documento"]
-    )
-    print_results(results, "Texto con 'reino' Y tipo 'fantastico'")
+    print_results(results_e, "Texto con 'reino' Y tipo 'fantastico'")
     
     # F. Aggregation Query (Estadísticas y filtros)
     print("\n📋 F. AGGREGATION QUERY (Filtros y estadísticas)")
-    results = query.aggregation_query("tipo_documento", "cuentos_por_tipo")
     print("\nConteo por tipo de documento:")
     print("-" * SEPARATOR_WIDTH)
-    for item in results:
+    for item in results_f:
         print(f"  • {item['key']}: {item['count']} documentos")
     
     # G. Multi Match Query
     print("\n📋 G. MULTI MATCH QUERY (Búsqueda en múltiples campos)")
-    results = query.multi_match_query(
-        "Maria dragon",
-        ["autor", "texto"],
-        source_fields=["autor", "tipo_documento"]
-    )
-    print_results(results, "Búsqueda 'Maria dragon' en autor y texto")
+    print_results(results_g, "Búsqueda 'Maria dragon' en autor y texto")
 
 
 def demo_informacion_indice(index_manager: IndexManager) -> None:
@@ -250,11 +306,14 @@ def main() -> None:
             # Creación del índice
             index_manager = demo_creacion_indice(es_client)
             
+            # Un único constructor de consultas (y una única caché de resultados)
+            query = QueryBuilder(es_client.get_client())
+            
             # Indexación de documentos
-            demo_indexacion(es_client)
+            demo_indexacion(es_client, query)
             
             # Consultas
-            demo_consultas(es_client, index_manager)
+            demo_consultas(query)
             
             # Información del índice
             demo_informacion_indice(index_manager)
@@ -0,0 +1,144 @@
+"""
+Módulo de consultas asíncronas a Elasticsearch
+Versión con AsyncElasticsearch de QueryBuilder, para ejecutar varias búsquedas a la vez.
+"""
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional
+from elasticsearch import AsyncElasticsearch
+from src.config import Config
+from src.logger import setup_logger
+from src.query_builder import QueryBuilder
+
+logger = setup_logger(__name__, Config.LOG_FILE, Config.LOG_LEVEL)
+
+
+class AsyncQueryBuilder:
+    """
+    Constructor de consultas asíncrono.
+    
+    Usa los mismos cuerpos de consulta y el mismo formato de resultados que
+    QueryBuilder, pero cada método es una corrutina; con run_many() (o
+    asyncio.gather) las peticiones se solapan y se paga una sola latencia de
+    red. QueryBuilder sigue siendo la opción para scripts y CLI.
+    """
+    
+    __slots__ = ('es', 'index_name', 'preference')
+    
+    def __init__(self, es_client: AsyncElasticsearch, preference: Optional[str] = None):
+        """
+        Inicializa el constructor de consultas asíncrono.
+        
+        Args:
+            es_client: Cliente asíncrono conectado, p. ej. el de
+                AsyncElasticsearchClient.get_client() (quien lo crea lo cierra,
+                dentro del mismo event loop)
+            preference: Preferencia de shards (por defecto, Config.ES_PREFERENCE;
+                ver QueryBuilder)
+        """
+        self.es = es_client
+        self.index_name = Config.INDEX_NAME
+        self.preference = preference if preference is not None else Config.ES_PREFERENCE
+    
+    async def run_many(self, coros: List[Awaitable[Any]]) -> List[Any]:
+        """
+        Ejecuta varias consultas de forma concurrente.
+        
+        Args:
+            coros: Corrutinas de este constructor (p. ej. `qb.match_query(...)`)
+            
+        Returns:
+            list: Resultados en el mismo orden que `coros`
+        """
+        return await asyncio.gather(*coros)
+    
+    async def _execute_query(self, query: Dict[str, Any], query_name: str,
+                             include_score: bool = False) -> List[Dict[str, Any]]:
+        """
+        Método base para ejecutar cualquier consulta.
+        
+        Args:
+            query: Consulta de Elasticsearch
+            query_name: Nombre de la consulta para logging
+            include_score: Si incluir el score de relevancia
+            
+        Returns:
+            list: Lista de documentos encontrados
+        """
+        try:
+            logger.info("Ejecutando %s (async)...", query_name)
+            params = {'request_cache': True} if QueryBuilder._is_filter_only(query) else {}
+            if self.preference:
+                params['preference'] = self.preference
+            response = await self.es.search(
+                index=self.index_name, body=query, track_total_hits=False, **params
+            )
+            
+            hits = response['hits']['hits']
+            logger.info("✓ %s: %d documentos", query_name, len(hits))
+            
+            return QueryBuilder._format_results(hits, include_score)
+            
+        except Exception as e:
+            logger.error("Error en %s: %s", query_name, e)
+            raise
+    
+    async def match_all(self, size: int = 100) -> List[Dict[str, Any]]:
+        """Consulta que devuelve todos los documentos (ver QueryBuilder.match_all)."""
+        return await self._execute_query(QueryBuilder.match_all_body(size), f"Match All (max {size} docs)")
+    
+    async def term_query(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        """Búsqueda exacta de un término (ver QueryBuilder.term_query)."""
+        return await self._execute_query(QueryBuilder.term_body(field, value), f"Term Query: {field}='{value}'")
+    
+    async def match_query(self, field: str, text: str, source_fields: Optional[List[str]] = None,
+                          preview: bool = False) -> List[Dict[str, Any]]:
+        """Búsqueda con análisis lingüístico (ver QueryBuilder.match_query)."""
+        query = QueryBuilder.match_body(field, text, source_fields, preview)
+        return await self._execute_query(query, f"Match Query: {field}='{text}'", include_score=True)
+    
+    async def range_query(self, field: str, gte: Optional[str] = None, lte: Optional[str] = None,
+                          source_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Búsqueda por rango (ver QueryBuilder.range_query)."""
+        query = QueryBuilder.range_body(field, gte, lte, source_fields)
+        return await self._execute_query(query, f"Range Query: {field} [{gte} - {lte}]")
+    
+    async def bool_query(self, must: Optional[List[Dict]] = None, filter_terms: Optional[List[Dict]] = None,
+                         should: Optional[List[Dict]] = None, source_fields: Optional[List[str]] = None,
+                         preview: bool = False) -> List[Dict[str, Any]]:
+        """Búsqueda booleana compuesta (ver QueryBuilder.bool_query)."""
+        query = QueryBuilder.bool_body(must, filter_terms, should, source_fields, preview)
+        return await self._execute_query(query, "Bool Query (consulta compuesta)", include_score=True)
+    
+    async def multi_match_query(self, text: str, fields: List[str],
+                                source_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Búsqueda en múltiples campos (ver QueryBuilder.multi_match_query)."""
+        query = QueryBuilder.multi_match_body(text, fields, source_fields)
+        return await self._execute_query(query, f"Multi Match Query: '{text}' en {fields}", include_score=True)
+    
+    async def aggregation_query(self, agg_field: str, agg_name: str = "aggregation") -> List[Dict[str, Any]]:
+        """
+        Consulta con agregaciones (ver QueryBuilder.aggregation_query).
+        
+        Args:
+            agg_field: Campo sobre el cual agregar
+            agg_name: Nombre de la agregación
+            
+        Returns:
+            list: Resultados de la agregación ({'key', 'count'})
+        """
+        try:
+            logger.info("Ejecutando Aggregation Query (async): campo '%s'", agg_field)
+            params = {'preference': self.preference} if self.preference else {}
+            response = await self.es.search(
+                index=self.index_name,
+                body=QueryBuilder.aggregation_body(agg_field, agg_name),
+                request_cache=True,
+                **params
+            )
+            buckets = response['aggregations'][agg_name]['buckets']
+            logger.info("✓ Agregación completada: %d categorías", len(buckets))
+            return QueryBuilder._format_buckets(buckets)
+            
+        except Exception as e:
+            logger.error("Error en Aggregation Query: %s", e)
+            raise
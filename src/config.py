@@ -4,6 +4,7 @@ Carga las variables de entorno y configuración del sistema.
 """
 import os
 from functools import lru_cache
+from typing import Optional
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -30,6 +31,31 @@ class Config:
     # Configuración de conexión
     REQUEST_TIMEOUT: int = int(os.getenv('REQUEST_TIMEOUT', '30'))
     MAX_RETRIES: int = int(os.getenv('MAX_RETRIES', '3'))
+    # Conexiones HTTP por nodo (urllib3 usa 10 por defecto y bloquea a los
+    # hilos que superen ese número hasta que se libere una conexión)
+    ES_MAXSIZE: int = int(os.getenv('ES_MAXSIZE', '32'))
+    # Hilos de la aplicación que consultan a la vez (p. ej. workers de un servidor web);
+    # el pool reserva dos conexiones por hilo
+    MAX_WORKERS: int = int(os.getenv('ES_MAX_WORKERS', '16'))
+    
+    # Intervalo de refresh del índice (Elasticsearch usa 1s por defecto; un valor
+    # mayor deja que Lucene agrupe más escrituras en cada segmento)
+    INDEX_REFRESH_INTERVAL: str = os.getenv('ES_REFRESH_INTERVAL', '30s')
+    
+    # Límite de from+size de Elasticsearch (index.max_result_window); por encima
+    # QueryBuilder pagina con Point-In-Time
+    MAX_RESULT_WINDOW: int = int(os.getenv('MAX_RESULT_WINDOW', '10000'))
+    
+    # Caché de resultados de QueryBuilder (segundos de validez y número máximo de consultas)
+    QUERY_CACHE_TTL: float = float(os.getenv('QUERY_CACHE_TTL', '60'))
+    QUERY_CACHE_MAX: int = int(os.getenv('QUERY_CACHE_MAX', '256'))
+    
+    # Preferencia de shards para las búsquedas (p. ej. "_local" o "session_<usuario>"):
+    # fija las copias que responden y con ello su request cache. Vacío: sin preferencia
+    ES_PREFERENCE: Optional[str] = os.getenv('ES_PREFERENCE') or None
+    
+    # Indexación masiva (hilos de parallel_bulk)
+    BULK_THREAD_COUNT: int = int(os.getenv('ES_BULK_THREADS', '12'))
     
     # Logging
     LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
@@ -64,6 +90,21 @@ class Config:
         if cls.MAX_RETRIES < 0:
             errors.append("MAX_RETRIES debe ser mayor o igual a 0")
         
+        if cls.ES_MAXSIZE <= 0:
+            errors.append("ES_MAXSIZE debe ser mayor a 0")
+        
+        if cls.MAX_WORKERS <= 0:
+            errors.append("ES_MAX_WORKERS debe ser mayor a 0")
+        
+        if cls.MAX_RESULT_WINDOW <= 0:
+            errors.append("MAX_RESULT_WINDOW debe ser mayor a 0")
+        
+        if cls.QUERY_CACHE_TTL < 0 or cls.QUERY_CACHE_MAX < 0:
+            errors.append("QUERY_CACHE_TTL y QUERY_CACHE_MAX deben ser mayores o iguales a 0")
+        
+        if cls.BULK_THREAD_COUNT <= 0:
+            errors.append("ES_BULK_THREADS debe ser mayor a 0")
+        
         if errors:
             raise ConfigError("; ".join(errors))
         
@@ -2,21 +2,108 @@
 Módulo de indexación de documentos
 Maneja la carga e indexación de documentos en Elasticsearch.
 """
-from typing import Dict, Any, List, Tuple
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+import orjson
 from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk
-from datetime import datetime
+from elasticsearch.helpers import parallel_bulk
 from src.config import Config
 from src.logger import setup_logger
 
 logger = setup_logger(__name__, Config.LOG_FILE, Config.LOG_LEVEL)
 
+# Constantes resueltas una sola vez al importar (evitan lookups en los bucles)
+_INDEX_NAME = Config.INDEX_NAME
+_REQUIRED_FIELDS = ('autor', 'tipo_documento', 'texto', 'fecha')
+_REQUIRED = frozenset(_REQUIRED_FIELDS)
+_DATE_FORMAT = '%Y-%m-%d'
+
+
+def _is_calendar_date(value: str) -> bool:
+    """Comprueba que una cadena YYYY-MM-DD sea una fecha que existe (p. ej. no 2024-02-31)."""
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_valid_date(value: Any) -> bool:
+    """
+    Comprueba que la fecha tenga formato YYYY-MM-DD y exista en el calendario.
+    
+    La forma se comprueba comparando caracteres; solo las cadenas con forma
+    válida se analizan (una vez) con date.fromisoformat.
+    """
+    return (
+        isinstance(value, str)
+        and len(value) == 10
+        and value[4] == '-' and value[7] == '-'
+        and value.isascii()
+        and value[:4].isdecimal() and value[5:7].isdecimal() and value[8:].isdecimal()
+        and _is_calendar_date(value)
+    )
+
+
+def _build_fast_validator(required_fields: Sequence[str]):
+    """
+    Genera en tiempo de ejecución un validador especializado para el esquema fijo.
+    
+    El código resultante es una secuencia lineal de comprobaciones (sin bucle
+    sobre los campos requeridos). Solo responde True/False; los mensajes de
+    error detallados los sigue construyendo validate_documents.
+    """
+    fields_check = " and ".join(f"{field!r} in d" for field in required_fields)
+    source = (
+        "def validate(d):\n"
+        f"    if not ({fields_check}):\n"
+        "        return False\n"
+        "    f = d['fecha']\n"
+        "    return (type(f) is str and len(f) == 10 and f[4] == '-' and f[7] == '-'\n"
+        "            and f.isascii() and f[:4].isdecimal() and f[5:7].isdecimal() and f[8:].isdecimal()\n"
+        "            and _is_calendar_date(f))\n"
+    )
+    namespace: Dict[str, Any] = {'_is_calendar_date': _is_calendar_date}
+    exec(compile(source, '<document_validator>', 'exec'), namespace)
+    return namespace['validate']
+
+
+_validate_fast = _build_fast_validator(_REQUIRED_FIELDS)
+
+
+def _date_error_detail(value: Any) -> str:
+    """Describe por qué una fecha no es válida (solo se usa en la ruta de error)."""
+    try:
+        datetime.strptime(value, _DATE_FORMAT)
+    except (TypeError, ValueError) as e:
+        return str(e)
+    return "se esperan mes y día con dos dígitos"
+
 
 class DocumentIndexer:
     """Gestor de indexación de documentos."""
     
-    REQUIRED_FIELDS = ['autor', 'tipo_documento', 'texto', 'fecha']
-    DATE_FORMAT = '%Y-%m-%d'
+    # Atributos fijos: sin __dict__ por instancia
+    __slots__ = ('es', 'index_name')
+    
+    REQUIRED_FIELDS = list(_REQUIRED_FIELDS)
+    REQUIRED_FIELDS_SET = _REQUIRED
+    DATE_FORMAT = _DATE_FORMAT
+    BULK_CHUNK_SIZE = 500
+    BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+    BULK_QUEUE_SIZE = 4
+    
+    # Ajustes temporales del índice durante una carga masiva
+    BULK_MODE_SETTINGS = {
+        'index.refresh_interval': '-1',
+        'index.number_of_replicas': 0,
+        'index.translog.durability': 'async',
+        'index.translog.flush_threshold_size': '1gb',
+    }
+    # Por debajo de este número de documentos los ajustes no compensan las
+    # tres peticiones extra (leer, aplicar y restaurar la configuración)
+    BULK_MODE_MIN_DOCS = 1000
     
     def __init__(self, es_client: Elasticsearch):
         """
@@ -26,7 +113,7 @@ class DocumentIndexer:
             es_client: Cliente de Elasticsearch conectado
         """
         self.es = es_client
-        self.index_name = Config.INDEX_NAME
+        self.index_name = _INDEX_NAME
     
     def validate_document(self, document: Dict[str, Any]) -> bool:
         """
@@ -42,21 +129,58 @@ class DocumentIndexer:
             ValueError: Si faltan campos requeridos o el formato es inválido
         """
         # Validar campos requeridos
-        missing_fields = [field for field in self.REQUIRED_FIELDS if field not in document]
+        missing_fields = [field for field in _REQUIRED_FIELDS if field not in document]
         if missing_fields:
             raise ValueError(f"Faltan campos requeridos: {', '.join(missing_fields)}")
         
         # Validar formato de fecha
-        try:
-            datetime.strptime(document['fecha'], self.DATE_FORMAT)
-        except ValueError:
+        if not _is_valid_date(document['fecha']):
             raise ValueError(
-                f"Formato de fecha inválido: {document['fecha']}. "
-                f"Usa formato {self.DATE_FORMAT}"
+                f"Formato de fecha inválido: {document['fecha']} "
+                f"({_date_error_detail(document['fecha'])}). Usa formato {_DATE_FORMAT}"
             )
         
         return True
     
+    def validate_documents(self, documents: Sequence[Dict[str, Any]]) -> bool:
+        """
+        Valida un lote de documentos en una sola pasada.
+        
+        A diferencia de llamar a validate_document por cada documento, reúne
+        todos los documentos inválidos y lanza un único error con sus índices.
+        
+        Args:
+            documents: Secuencia de documentos a validar
+            
+        Returns:
+            bool: True si todos los documentos son válidos
+            
+        Raises:
+            ValueError: Si algún documento no es válido (indica sus posiciones, base 1)
+        """
+        # Camino rápido: si todo es válido no hace falta el diagnóstico detallado
+        if all(map(_validate_fast, documents)):
+            return True
+        
+        missing = [i for i, doc in enumerate(documents, 1) if not _REQUIRED.issubset(doc)]
+        bad_dates = [
+            i for i, doc in enumerate(documents, 1)
+            if 'fecha' in doc and not _is_valid_date(doc['fecha'])
+        ]
+        
+        errors = []
+        if missing:
+            errors.append(f"faltan campos requeridos en documentos {missing}")
+        if bad_dates:
+            errors.append(
+                f"formato de fecha inválido en documentos {bad_dates} "
+                f"(usa formato {_DATE_FORMAT})"
+            )
+        if errors:
+            raise ValueError("Error de validación: " + "; ".join(errors))
+        
+        return True
+    
     def index_single_document(self, document: Dict[str, Any], doc_id: Any = None) -> Dict[str, Any]:
         """
         Indexa un solo documento.
@@ -84,12 +208,140 @@ class DocumentIndexer:
             logger.error("Error al indexar documento: %s", e)
             raise
     
-    def index_bulk_documents(self, documents: List[Dict[str, Any]]) -> Tuple[int, List]:
+    def _generate_actions(self, documents: Sequence[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Genera las acciones de bulk bajo demanda, sin materializar una lista.
+        
+        No se asigna `_id`: Elasticsearch genera los IDs y puede usar la ruta
+        de solo-inserción, sin buscar una versión previa de cada documento.
+        
+        Args:
+            documents: Secuencia de documentos a indexar
+            
+        Yields:
+            dict: Acción de indexación para el helper de bulk
+        """
+        for doc in documents:
+            yield {
+                "_index": self.index_name,
+                "_source": doc
+            }
+    
+    @contextmanager
+    def bulk_mode(self, tune_settings: bool = True) -> Iterator[None]:
+        """
+        Contexto de carga masiva.
+        
+        Al entrar desactiva el refresh periódico, las réplicas y el fsync por
+        petición del translog; al salir restaura los valores previos del índice
+        y, si la carga terminó sin errores, hace un único refresh para que los
+        documentos queden visibles. En modo serverless estos ajustes no están
+        permitidos y solo se hace el refresh final.
+        
+        Args:
+            tune_settings: Si aplicar los ajustes temporales (con False solo se
+                hace el refresh final; útil para cargas pequeñas)
+        """
+        previous = None
+        if tune_settings:
+            try:
+                response = self.es.indices.get_settings(index=self.index_name, flat_settings=True)
+                current = response[self.index_name]['settings']
+                # None restablece el valor por defecto de Elasticsearch
+                previous = {key: current.get(key) for key in self.BULK_MODE_SETTINGS}
+                self.es.indices.put_settings(index=self.index_name, settings=self.BULK_MODE_SETTINGS)
+                logger.info("Modo bulk activado en '%s'", self.index_name)
+            except Exception as e:
+                previous = None
+                logger.warning("No se pudo activar el modo bulk (¿Serverless?): %s", e)
+        
+        try:
+            yield
+        finally:
+            if previous is not None:
+                try:
+                    self.es.indices.put_settings(index=self.index_name, settings=previous)
+                    logger.info("Modo bulk desactivado en '%s'", self.index_name)
+                except Exception as e:
+                    logger.error("Error al restaurar la configuración del índice: %s", e)
+        
+        # Solo si la carga no falló: en finally, un error del refresh ocultaría el original
+        self.es.indices.refresh(index=self.index_name)
+    
+    def build_ndjson(self, documents: Sequence[Dict[str, Any]]) -> Optional[bytes]:
+        """
+        Serializa los documentos directamente como cuerpo NDJSON de _bulk.
+        
+        Args:
+            documents: Secuencia de documentos a indexar
+            
+        Returns:
+            bytes: Cuerpo listo para enviar, o None si supera BULK_MAX_CHUNK_BYTES
+                (en ese caso conviene dividirlo con parallel_bulk)
+        """
+        header = orjson.dumps({"index": {"_index": self.index_name}})
+        lines = []
+        size = 0
+        for doc in documents:
+            line = orjson.dumps(doc, option=orjson.OPT_NON_STR_KEYS)
+            size += len(header) + len(line) + 2
+            if size > self.BULK_MAX_CHUNK_BYTES:
+                return None
+            lines.append(header)
+            lines.append(line)
+        return b"\n".join(lines) + b"\n"
+    
+    def index_ndjson(self, body: bytes) -> Tuple[int, List]:
+        """
+        Envía un cuerpo NDJSON ya serializado en una única petición _bulk.
+        
+        Args:
+            body: Cuerpo generado por build_ndjson
+            
+        Returns:
+            tuple: (éxitos, errores), con el mismo formato que index_bulk_documents
+        """
+        response = self.es.bulk(operations=body)
+        items = response['items']
+        errors = [item for item in items if 'error' in next(iter(item.values()))]
+        return len(items) - len(errors), errors
+    
+    def _index_parallel(self, documents: Sequence[Dict[str, Any]]) -> Tuple[int, List]:
+        """
+        Indexa con parallel_bulk (las acciones se generan y envían por chunks).
+        
+        Args:
+            documents: Secuencia de documentos a indexar
+            
+        Returns:
+            tuple: (éxitos, errores)
+        """
+        success_count = 0
+        errors = []
+        for ok, info in parallel_bulk(
+            self.es,
+            self._generate_actions(documents),
+            thread_count=Config.BULK_THREAD_COUNT,
+            chunk_size=self.BULK_CHUNK_SIZE,
+            queue_size=self.BULK_QUEUE_SIZE,
+            max_chunk_bytes=self.BULK_MAX_CHUNK_BYTES,
+            raise_on_error=False
+        ):
+            if ok:
+                success_count += 1
+            else:
+                errors.append(info)
+        return success_count, errors
+    
+    def index_bulk_documents(self, documents: Sequence[Dict[str, Any]]) -> Tuple[int, List]:
         """
         Indexa múltiples documentos usando bulk API para mayor eficiencia.
         
+        Al volver, los documentos ya son buscables: bulk_mode() hace el único
+        refresh necesario, así que no hace falta llamar a refresh_index().
+        
         Args:
-            documents: Lista de documentos a indexar
+            documents: Secuencia de documentos a indexar
             
         Returns:
             tuple: (éxitos, errores)
@@ -97,31 +349,16 @@ class DocumentIndexer:
         try:
             logger.info("Iniciando indexación masiva de %d documentos...", len(documents))
             
-            # Validar todos los documentos primero
-            for i, doc in enumerate(documents, 1):
-                try:
-                    self.validate_document(doc)
-                except ValueError as e:
-                    logger.error("Error de validación en documento %d: %s", i, e)
-                    raise
-            
-            # Preparar acciones para bulk
-            actions = [
-                {
-                    "_index": self.index_name,
-                    "_id": i,
-                    "_source": doc
-                }
-                for i, doc in enumerate(documents, start=1)
-            ]
-            
-            # Ejecutar bulk
-            success_count, errors = bulk(
-                self.es,
-                actions,
-                stats_only=False,
-                raise_on_error=False
-            )
+            # Validar todos los documentos primero (un único error agregado)
+            self.validate_documents(documents)
+            
+            with self.bulk_mode(tune_settings=len(documents) >= self.BULK_MODE_MIN_DOCS):
+                # Lotes pequeños: un único _bulk con NDJSON serializado por orjson
+                body = self.build_ndjson(documents) if documents else None
+                if body is not None:
+                    success_count, errors = self.index_ndjson(body)
+                else:
+                    success_count, errors = self._index_parallel(documents)
             
             logger.info("✓ Indexación completada:")
             logger.info("  - Documentos exitosos: %d", success_count)
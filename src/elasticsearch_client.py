@@ -2,22 +2,67 @@
 Módulo de conexión a Elasticsearch
 Gestiona la conexión y operaciones básicas con el servidor.
 """
-from typing import Optional, Dict, Any
-from elasticsearch import Elasticsearch
-from elasticsearch.exceptions import ConnectionError, AuthenticationException
+import asyncio
+import logging
+import threading
+from typing import TYPE_CHECKING, ClassVar, Optional, Dict, Any
 from src.config import Config, ConfigError
 from src.logger import setup_logger
 
+# elasticsearch (y urllib3, certifi...) se importa al conectar, no al importar el módulo
+if TYPE_CHECKING:
+    from elasticsearch import AsyncElasticsearch, Elasticsearch
+
 logger = setup_logger(__name__, Config.LOG_FILE, Config.LOG_LEVEL)
 
 
 class ElasticsearchClient:
-    """Cliente para gestionar la conexión a Elasticsearch con soporte de context manager."""
+    """
+    Cliente para gestionar la conexión a Elasticsearch con soporte de context manager.
+    
+    Cada instancia posee su propio pool de conexiones y contexto TLS. Para
+    compartir una única conexión en todo el proceso usa
+    ElasticsearchClient.instance() en lugar de crear instancias nuevas.
+    """
+    
+    _instance: ClassVar[Optional['ElasticsearchClient']] = None
+    _instance_lock: ClassVar[threading.Lock] = threading.Lock()
     
     def __init__(self):
         """Inicializa el cliente de Elasticsearch."""
-        self.client: Optional[Elasticsearch] = None
+        self.client: Optional['Elasticsearch'] = None
         self.is_connected: bool = False
+        # URL y autenticación se resuelven una vez (las reconexiones las reutilizan)
+        self._url: str = Config.get_elastic_url()
+        self._auth: Dict[str, Any] = Config.get_auth_config()
+    
+    @classmethod
+    def instance(cls) -> 'ElasticsearchClient':
+        """
+        Obtiene el cliente compartido por todo el proceso (conectado).
+        
+        La primera llamada conecta; las siguientes reutilizan la misma
+        conexión. Es seguro llamarlo desde varios hilos.
+        
+        Returns:
+            ElasticsearchClient: Cliente conectado
+            
+        Raises:
+            ConnectionError: Si no se puede conectar al servidor
+            ConfigError: Si la configuración es inválida
+        """
+        instance = cls._instance
+        if instance is not None and instance.is_connected:
+            return instance
+        
+        with cls._instance_lock:
+            if cls._instance is None or not cls._instance.is_connected:
+                instance = cls()
+                if not instance.connect():
+                    from elasticsearch.exceptions import ConnectionError
+                    raise ConnectionError("No se pudo conectar a Elasticsearch")
+                cls._instance = instance
+            return cls._instance
     
     def __enter__(self):
         """Permite usar el cliente con context manager."""
@@ -34,67 +79,59 @@ class ElasticsearchClient:
         Establece conexión con Elasticsearch.
         
         Returns:
-            bool: True si la conexión fue exitosa
+            bool: True si la conexión fue exitosa; False si el servidor no
+                responde (error de red, timeout o TLS)
             
         Raises:
-            ConnectionError: Si no se puede conectar al servidor
             AuthenticationException: Si las credenciales son inválidas
             ConfigError: Si la configuración es inválida
         """
+        from elasticsearch.exceptions import AuthenticationException, TransportError
+        from src.es_client import create_client
+        
         try:
             logger.info("Intentando conectar a Elasticsearch...")
             
             # Validar configuración
             Config.validate()
             
-            # Obtener URL y configuración de autenticación
-            url = Config.get_elastic_url()
-            auth_config = Config.get_auth_config()
-            
-            logger.info(f"Conectando a: {url}")
-            logger.info(f"Método de autenticación: {'API Key' if 'api_key' in auth_config else 'Usuario/Contraseña'}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Conectando a: %s", self._url)
+                logger.info("Método de autenticación: %s",
+                            'API Key' if 'api_key' in self._auth else 'Usuario/Contraseña')
             
             # Crear cliente con configuración optimizada
-            self.client = Elasticsearch(
-                url,
-                **auth_config,
-                request_timeout=Config.REQUEST_TIMEOUT,
-                max_retries=Config.MAX_RETRIES,
-                retry_on_timeout=True,
-                verify_certs=True
-            )
+            self.client = create_client(self._url, self._auth)
             
-            # Verificar conexión
-            if not self.client.ping():
-                logger.error("✗ Fallo en la conexión: El servidor no responde")
+            # Verificar conexión y obtener información del servidor (un solo GET /)
+            try:
+                info = self.client.info()
+            except TransportError as e:
+                # Incluye ConnectionError (red, timeout, TLS); los errores HTTP
+                # como la autenticación son ApiError y se tratan abajo
+                logger.error("✗ Fallo en la conexión: El servidor no responde (%s)", e)
+                logger.error("Verifica que el CLOUD_ID sea correcto y que tengas conexión a internet")
                 return False
-            
-            # Obtener información del servidor
-            info = self.client.info()
             self.is_connected = True
             
-            logger.info("✓ Conexión exitosa a Elasticsearch")
-            logger.info(f"  - Versión del servidor: {info['version']['number']}")
-            logger.info(f"  - Cluster: {info['cluster_name']}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("✓ Conexión exitosa a Elasticsearch")
+                logger.info("  - Versión del servidor: %s", info['version']['number'])
+                logger.info("  - Cluster: %s", info['cluster_name'])
             
             return True
                 
         except ConfigError as e:
-            logger.error(f"✗ Error de configuración: {e}")
+            logger.error("✗ Error de configuración: %s", e)
             raise
             
         except AuthenticationException as e:
-            logger.error(f"✗ Error de autenticación: {e}")
+            logger.error("✗ Error de autenticación: %s", e)
             logger.error("Verifica que tu API_KEY o credenciales sean correctas")
             raise
             
-        except ConnectionError as e:
-            logger.error(f"✗ Error de conexión: {e}")
-            logger.error("Verifica que el CLOUD_ID sea correcto y que tengas conexión a internet")
-            raise
-            
         except Exception as e:
-            logger.error(f"✗ Error inesperado al conectar: {e}")
+            logger.error("✗ Error inesperado al conectar: %s", e)
             raise
     
     
@@ -105,7 +142,7 @@ class ElasticsearchClient:
             self.is_connected = False
             logger.info("Conexión cerrada")
     
-    def get_client(self) -> Elasticsearch:
+    def get_client(self) -> 'Elasticsearch':
         """
         Obtiene el cliente de Elasticsearch.
         
@@ -132,17 +169,136 @@ class ElasticsearchClient:
             # Intentar obtener health del cluster (no disponible en serverless)
             try:
                 health = client.cluster.health()
-                logger.info(f"Estado del cluster: {health['status']}")
-                logger.info(f"Nodos: {health['number_of_nodes']}")
-                logger.info(f"Índices activos: {health['active_primary_shards']}")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Estado del cluster: %s", health['status'])
+                    logger.info("Nodos: %s", health['number_of_nodes'])
+                    logger.info("Índices activos: %s", health['active_primary_shards'])
                 return health
             except Exception:
                 # Modo serverless - usar verificación alternativa
                 logger.info("Modo Serverless detectado - usando verificación alternativa")
                 info = client.info()
-                logger.info(f"Cluster UUID: {info.get('cluster_uuid', 'N/A')}")
+                logger.info("Cluster UUID: %s", info.get('cluster_uuid', 'N/A'))
                 return {'status': 'serverless', 'info': info}
             
         except Exception as e:
-            logger.error(f"Error al verificar salud del cluster: {e}")
+            logger.error("Error al verificar salud del cluster: %s", e)
+            raise
+
+
+class AsyncElasticsearchClient:
+    """
+    Variante asíncrona de ElasticsearchClient (AsyncElasticsearch sobre aiohttp).
+    
+    Pensada para código que ya corre dentro de un event loop: las peticiones
+    independientes se solapan con asyncio.gather en un solo hilo. Usa la misma
+    configuración (autenticación, pool, serializadores) que el cliente síncrono.
+    """
+    
+    def __init__(self):
+        """Inicializa el cliente asíncrono de Elasticsearch."""
+        self.client: Optional['AsyncElasticsearch'] = None
+        self.is_connected: bool = False
+        self._url: str = Config.get_elastic_url()
+        self._auth: Dict[str, Any] = Config.get_auth_config()
+    
+    async def __aenter__(self):
+        """Permite usar el cliente con `async with`."""
+        await self.connect()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Cierra automáticamente la conexión al salir del contexto."""
+        await self.disconnect()
+        return False
+    
+    async def connect(self) -> bool:
+        """
+        Establece conexión con Elasticsearch.
+        
+        Returns:
+            bool: True si la conexión fue exitosa
+            
+        Raises:
+            AuthenticationException: Si las credenciales son inválidas
+            ConfigError: Si la configuración es inválida
+        """
+        from elasticsearch.exceptions import TransportError
+        from src.es_client import create_async_client
+        
+        try:
+            Config.validate()
+            self.client = create_async_client(self._url, self._auth)
+            
+            try:
+                info = await self.client.info()
+            except TransportError as e:
+                logger.error("✗ Fallo en la conexión: El servidor no responde (%s)", e)
+                await self.client.close()
+                return False
+            self.is_connected = True
+            
+            logger.info("✓ Conexión asíncrona a Elasticsearch (versión %s)", info['version']['number'])
+            return True
+            
+        except Exception as e:
+            logger.error("✗ Error al conectar (async): %s", e)
+            raise
+    
+    async def disconnect(self) -> None:
+        """Cierra la conexión a Elasticsearch (debe llamarse dentro del event loop)."""
+        if self.client:
+            await self.client.close()
+            self.is_connected = False
+            logger.info("Conexión asíncrona cerrada")
+    
+    def get_client(self) -> 'AsyncElasticsearch':
+        """
+        Obtiene el cliente asíncrono de Elasticsearch.
+        
+        Returns:
+            AsyncElasticsearch: Cliente conectado
+            
+        Raises:
+            RuntimeError: Si no hay conexión establecida
+        """
+        if not self.is_connected or not self.client:
+            raise RuntimeError("No hay conexión a Elasticsearch. Llama a connect() primero.")
+        return self.client
+    
+    async def check_health(self) -> Dict[str, Any]:
+        """
+        Verifica el estado de salud del cluster.
+        
+        Pide info y health a la vez; si health no está disponible (serverless)
+        se devuelve la información del servidor, igual que en el cliente síncrono.
+        
+        Returns:
+            dict: Información del estado del cluster
+        """
+        try:
+            client = self.get_client()
+            
+            info, health = await asyncio.gather(
+                client.info(),
+                client.cluster.health(),
+                return_exceptions=True
+            )
+            
+            if not isinstance(health, Exception):
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Estado del cluster: %s", health['status'])
+                    logger.info("Nodos: %s", health['number_of_nodes'])
+                    logger.info("Índices activos: %s", health['active_primary_shards'])
+                return health
+            
+            # Modo serverless - usar verificación alternativa
+            if isinstance(info, Exception):
+                raise info
+            logger.info("Modo Serverless detectado - usando verificación alternativa")
+            logger.info("Cluster UUID: %s", info.get('cluster_uuid', 'N/A'))
+            return {'status': 'serverless', 'info': info}
+            
+        except Exception as e:
+            logger.error("Error al verificar salud del cluster: %s", e)
             raise
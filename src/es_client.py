@@ -0,0 +1,121 @@
+"""
+Módulo de creación del cliente de Elasticsearch
+Centraliza las opciones del cliente para que todas las conexiones compartan la misma configuración.
+"""
+import socket
+import ssl
+from typing import Any, Dict, Optional
+import certifi
+import orjson
+from elastic_transport import Urllib3HttpNode
+from elasticsearch import AsyncElasticsearch, Elasticsearch
+from elasticsearch.serializer import JsonSerializer, NdjsonSerializer
+from urllib3.connection import HTTPConnection
+from src.config import Config
+
+# Contexto TLS compartido: el bundle de CAs se carga una sola vez por proceso
+# (check_hostname y CERT_REQUIRED vienen activados por defecto)
+_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+
+# TCP keepalive: evita que un NAT/balanceador cierre en silencio los sockets
+# inactivos del pool (la siguiente petición pagaría reconexión + TLS)
+_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+# Parámetros finos de keepalive (solo en plataformas que los exponen, p. ej. Linux)
+for _name, _value in (('TCP_KEEPIDLE', 60), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 6)):
+    if hasattr(socket, _name):
+        _SOCKET_OPTIONS.append((socket.IPPROTO_TCP, getattr(socket, _name), _value))
+
+
+class _OrjsonMixin:
+    """Sustituye la codificación JSON de la biblioteca estándar por orjson (implementado en C)."""
+    
+    def json_dumps(self, data: Any) -> bytes:
+        return orjson.dumps(data, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+    
+    def json_loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class OrjsonSerializer(_OrjsonMixin, JsonSerializer):
+    """Serializador JSON (búsquedas, mappings, respuestas) basado en orjson."""
+
+
+class OrjsonNdjsonSerializer(_OrjsonMixin, NdjsonSerializer):
+    """Serializador NDJSON (bulk, msearch) basado en orjson."""
+
+
+class KeepaliveUrllib3HttpNode(Urllib3HttpNode):
+    """Nodo HTTP (urllib3) cuyas conexiones activan TCP keepalive."""
+    
+    def __init__(self, config):
+        super().__init__(config)
+        # Se aplica a cada conexión nueva que abra el pool
+        self.pool.conn_kw['socket_options'] = _SOCKET_OPTIONS
+
+
+def _client_options(url: str, auth: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Opciones comunes a los clientes síncrono y asíncrono."""
+    options = {
+        **(auth if auth is not None else Config.get_auth_config()),
+        'request_timeout': Config.REQUEST_TIMEOUT,
+        'max_retries': Config.MAX_RETRIES,
+        'retry_on_timeout': True,
+        # Al menos una conexión por hilo de parallel_bulk y dos por worker
+        'connections_per_node': max(
+            Config.ES_MAXSIZE, Config.MAX_WORKERS * 2, Config.BULK_THREAD_COUNT
+        ),
+        # gzip en peticiones y respuestas (también envía Accept-Encoding: gzip)
+        'http_compress': True,
+        'serializers': {
+            JsonSerializer.mimetype: OrjsonSerializer(),
+            NdjsonSerializer.mimetype: OrjsonNdjsonSerializer(),
+        },
+    }
+    # El contexto TLS solo es válido con https; con http se conserva verify_certs
+    if url.startswith('https://'):
+        options['ssl_context'] = _SSL_CONTEXT
+    else:
+        options['verify_certs'] = True
+    return options
+
+
+def create_client(url: Optional[str] = None,
+                  auth: Optional[Dict[str, Any]] = None) -> Elasticsearch:
+    """
+    Crea un cliente de Elasticsearch con la configuración del proyecto.
+    
+    No realiza ninguna petición; la conexión se establece en el primer uso.
+    
+    Args:
+        url: URL de Elasticsearch (por defecto Config.get_elastic_url())
+        auth: Opciones de autenticación (por defecto Config.get_auth_config())
+    
+    Returns:
+        Elasticsearch: Cliente configurado
+    """
+    url = url or Config.get_elastic_url()
+    return Elasticsearch(
+        url,
+        node_class=KeepaliveUrllib3HttpNode,
+        **_client_options(url, auth)
+    )
+
+
+def create_async_client(url: Optional[str] = None,
+                        auth: Optional[Dict[str, Any]] = None) -> AsyncElasticsearch:
+    """
+    Crea un cliente asíncrono (aiohttp) con la misma configuración que create_client.
+    
+    Debe cerrarse con `await client.close()` dentro del event loop.
+    
+    Args:
+        url: URL de Elasticsearch (por defecto Config.get_elastic_url())
+        auth: Opciones de autenticación (por defecto Config.get_auth_config())
+    
+    Returns:
+        AsyncElasticsearch: Cliente asíncrono configurado
+    """
+    url = url or Config.get_elastic_url()
+    return AsyncElasticsearch(url, **_client_options(url, auth))
@@ -2,15 +2,89 @@
 Módulo de gestión de índices
 Maneja la creación, configuración y eliminación de índices en Elasticsearch.
 """
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Tuple
+import orjson
 from src.config import Config
 from src.logger import setup_logger
 
 logger = setup_logger(__name__, Config.LOG_FILE, Config.LOG_LEVEL)
 
+# Hilos compartidos para lanzar en paralelo las peticiones de get_index_info
+# (se crean al primer uso y se reutilizan en las llamadas siguientes)
+_INFO_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='index-info')
+
+# Configuración del índice de cuentos (constante: se construye una sola vez al importar).
+# Es un dict normal porque el cliente debe poder serializarlo; no lo modifiques.
+_MAPPING_CONFIG: Dict[str, Any] = {
+    "settings": {
+        # En modo serverless, no se pueden configurar shards y replicas
+        "refresh_interval": Config.INDEX_REFRESH_INTERVAL,
+        "analysis": {
+            "analyzer": {
+                "spanish_analyzer": {
+                    "type": "custom",
+                    "tokenizer": "standard",
+                    "filter": [
+                        "lowercase",
+                        "asciifolding",
+                        "spanish_stop",
+                        "spanish_stemmer"
+                    ]
+                }
+            },
+            "filter": {
+                "spanish_stop": {
+                    "type": "stop",
+                    "stopwords": "_spanish_"
+                },
+                "spanish_stemmer": {
+                    "type": "stemmer",
+                    "language": "spanish"
+                }
+            }
+        }
+    },
+    "mappings": {
+        "properties": {
+            "autor": {
+                "type": "keyword"
+            },
+            "tipo_documento": {
+                "type": "keyword"
+            },
+            "fecha": {
+                "type": "date",
+                "format": "yyyy-MM-dd"
+            },
+            "texto": {
+                "type": "text",
+                "analyzer": "spanish_analyzer",
+                "fields": {
+                    "keyword": {
+                        "type": "keyword",
+                        "ignore_above": 256
+                    }
+                }
+            }
+        }
+    }
+}
+
+# Cuerpo JSON de creación del índice: es estático, así que se serializa una sola vez
+_CREATE_BODY: bytes = orjson.dumps(_MAPPING_CONFIG)
+
 
 class IndexManager:
     """Gestor de índices de Elasticsearch."""
     
+    # Segundos durante los que se reutiliza el resultado de index_exists()
+    EXISTS_CACHE_TTL = 5.0
+    
+    # Atributos fijos: sin __dict__ por instancia
+    __slots__ = ('es', 'index_name', '_exists_cache')
+    
     def __init__(self, es_client):
         """
         Inicializa el gestor de índices.
@@ -20,80 +94,42 @@ class IndexManager:
         """
         self.es = es_client
         self.index_name = Config.INDEX_NAME
+        # nombre del índice -> (instante de la comprobación, existe)
+        self._exists_cache: Dict[str, Tuple[float, bool]] = {}
+    
+    def _set_exists(self, exists: bool) -> None:
+        """Registra en caché si el índice existe (tras comprobarlo, crearlo o borrarlo)."""
+        self._exists_cache[self.index_name] = (time.monotonic(), exists)
     
     def get_mapping_configuration(self):
         """
         Obtiene la configuración del mapping para el índice de cuentos.
         
         Returns:
-            dict: Configuración completa del mapping
+            dict: Configuración completa del mapping (compartida, de solo lectura)
         """
-        return {
-            "settings": {
-                # En modo serverless, no se pueden configurar shards y replicas
-                "analysis": {
-                    "analyzer": {
-                        "spanish_analyzer": {
-                            "type": "custom",
-                            "tokenizer": "standard",
-                            "filter": [
-                                "lowercase",
-                                "asciifolding",
-                                "spanish_stop",
-                                "spanish_stemmer"
-                            ]
-                        }
-                    },
-                    "filter": {
-                        "spanish_stop": {
-                            "type": "stop",
-                            "stopwords": "_spanish_"
-                        },
-                        "spanish_stemmer": {
-                            "type": "stemmer",
-                            "language": "spanish"
-                        }
-                    }
-                }
-            },
-            "mappings": {
-                "properties": {
-                    "autor": {
-                        "type": "keyword"
-                    },
-                    "tipo_documento": {
-                        "type": "keyword"
-                    },
-                    "fecha": {
-                        "type": "date",
-                        "format": "yyyy-MM-dd"
-                    },
-                    "texto": {
-                        "type": "text",
-                        "analyzer": "spanish_analyzer",
-                        "fields": {
-                            "keyword": {
-                                "type": "keyword",
-                                "ignore_above": 256
-                            }
-                        }
-                    }
-                }
-            }
-        }
+        return _MAPPING_CONFIG
     
     def index_exists(self):
         """
         Verifica si el índice existe.
         
+        El resultado se reutiliza durante EXISTS_CACHE_TTL segundos para evitar
+        peticiones HEAD repetidas; create_index y delete_index lo actualizan.
+        
         Returns:
             bool: True si el índice existe
         """
+        cached = self._exists_cache.get(self.index_name)
+        if cached is not None and time.monotonic() - cached[0] < self.EXISTS_CACHE_TTL:
+            return cached[1]
+        
         try:
-            exists = self.es.indices.exists(index=self.index_name)
+            exists = bool(self.es.indices.exists(index=self.index_name))
+            self._set_exists(exists)
             return exists
         except Exception as e:
-            logger.error(f"Error al verificar existencia del índice: {e}")
+            logger.error("Error al verificar existencia del índice: %s", e)
             raise
     
     def delete_index(self):
@@ -106,13 +142,14 @@ class IndexManager:
         try:
             if self.index_exists():
                 self.es.indices.delete(index=self.index_name)
-                logger.info(f"✓ Índice '{self.index_name}' eliminado exitosamente")
+                self._set_exists(False)
+                logger.info("✓ Índice '%s' eliminado exitosamente", self.index_name)
                 return True
             else:
-                logger.info(f"El índice '{self.index_name}' no existe")
+                logger.info("El índice '%s' no existe", self.index_name)
                 return True
         except Exception as e:
-            logger.error(f"Error al eliminar el índice: {e}")
+            logger.error("Error al eliminar el índice: %s", e)
             raise
     
     def create_index(self, delete_if_exists=False):
@@ -132,26 +169,26 @@ class IndexManager:
             
             # Verificar si ya existe
             if self.index_exists():
-                logger.warning(f"El índice '{self.index_name}' ya existe")
+                logger.warning("El índice '%s' ya existe", self.index_name)
                 return False
             
-            # Obtener configuración del mapping
-            mapping_config = self.get_mapping_configuration()
-            
-            # Crear índice
-            self.es.indices.create(
-                index=self.index_name,
-                body=mapping_config
+            # Crear índice con el cuerpo ya serializado (PUT /<índice>)
+            self.es.perform_request(
+                "PUT",
+                f"/{self.index_name}",
+                headers={"content-type": "application/json", "accept": "application/json"},
+                body=_CREATE_BODY
             )
+            self._set_exists(True)
             
-            logger.info(f"✓ Índice '{self.index_name}' creado exitosamente")
-            logger.info(f"  - Analizador: spanish_analyzer")
-            logger.info(f"  - Campos: autor, tipo_documento, fecha, texto")
+            logger.info("✓ Índice '%s' creado exitosamente", self.index_name)
+            logger.info("  - Analizador: spanish_analyzer")
+            logger.info("  - Campos: autor, tipo_documento, fecha, texto")
             
             return True
             
         except Exception as e:
-            logger.error(f"Error al crear el índice: {e}")
+            logger.error("Error al crear el índice: %s", e)
             raise
     
     def get_index_info(self):
@@ -163,29 +200,28 @@ class IndexManager:
         """
         try:
             if not self.index_exists():
-                logger.warning(f"El índice '{self.index_name}' no existe")
+                logger.warning("El índice '%s' no existe", self.index_name)
                 return None
             
-            # Obtener información del índice
-            info = self.es.indices.get(index=self.index_name)
+            # get y stats viajan en paralelo por el pool de conexiones
+            info_future = _INFO_EXECUTOR.submit(self.es.indices.get, index=self.index_name)
+            stats_future = _INFO_EXECUTOR.submit(self.es.indices.stats, index=self.index_name)
             
-            # En modo serverless, stats no está disponible
-            # Usar count en su lugar
+            info = info_future.result()
             try:
-                stats = self.es.indices.stats(index=self.index_name)
+                stats = stats_future.result()
                 doc_count = stats['_all']['primaries']['docs']['count']
                 size = stats['_all']['primaries']['store']['size_in_bytes']
             except Exception:
-                # Modo serverless - usar count alternativo
-                count_result = self.es.count(index=self.index_name)
-                doc_count = count_result['count']
+                # Modo serverless (sin stats) - usar count alternativo
+                doc_count = self.es.count(index=self.index_name)['count']
                 size = 0  # No disponible en serverless
                 logger.info("Modo Serverless - estadísticas de tamaño no disponibles")
             
-            logger.info(f"Información del índice '{self.index_name}':")
-            logger.info(f"  - Documentos: {doc_count}")
+            logger.info("Información del índice '%s':", self.index_name)
+            logger.info("  - Documentos: %s", doc_count)
             if size > 0:
-                logger.info(f"  - Tamaño: {size / 1024:.2f} KB")
+                logger.info("  - Tamaño: %.2f KB", size / 1024)
             
             return {
                 'index_info': info,
@@ -194,16 +230,32 @@ class IndexManager:
             }
             
         except Exception as e:
-            logger.error(f"Error al obtener información del índice: {e}")
+            logger.error("Error al obtener información del índice: %s", e)
             raise
     
-    def refresh_index(self):
+    def refresh_index(self, force: bool = False):
         """
         Refresca el índice para que los cambios sean visibles inmediatamente.
+        
+        Un refresh forzado crea un segmento nuevo y frena la indexación, así que
+        por defecto no se hace: el índice se refresca solo cada
+        Config.INDEX_REFRESH_INTERVAL y DocumentIndexer.bulk_mode() refresca al
+        terminar cada carga.
+        
+        Args:
+            force: Si es True, refresca el índice de todos modos
         """
+        if not force:
+            logger.warning(
+                "refresh_index() sin force=True no hace nada; el índice se refresca "
+                "cada %s (usa force=True si de verdad lo necesitas)",
+                Config.INDEX_REFRESH_INTERVAL
+            )
+            return
+        
         try:
             self.es.indices.refresh(index=self.index_name)
-            logger.debug(f"Índice '{self.index_name}' refrescado")
+            logger.debug("Índice '%s' refrescado", self.index_name)
         except Exception as e:
-            logger.error(f"Error al refrescar el índice: {e}")
+            logger.error("Error al refrescar el índice: %s", e)
             raise
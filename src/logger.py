@@ -2,35 +2,160 @@
 Módulo de utilidades para logging
 Configura el sistema de logging para la aplicación.
 """
+import atexit
 import logging
 import os
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
-from colorama import Fore, Style, init
+from functools import lru_cache
 
-# Inicializar colorama para Windows
-init(autoreset=True)
+# Formato común de consola y archivo
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
+# Rotación del archivo de log
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
 
-class ColoredFormatter(logging.Formatter):
+
+@lru_cache(maxsize=None)
+def _colorama():
+    """Importa e inicializa colorama en el primer uso (una sola vez por proceso)."""
+    import colorama
+    colorama.init(autoreset=True)
+    return colorama
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formateador que reutiliza la fecha formateada mientras no cambie el segundo."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (segundo, fecha formateada) en una sola tupla: el formateador de consola
+        # se usa desde varios hilos y así se lee y se sustituye de una vez
+        self._last = (None, '')
+    
+    def formatTime(self, record, datefmt=None):
+        if datefmt is None:
+            return super().formatTime(record, datefmt)
+        # strftime solo una vez por segundo (el formato no incluye milisegundos)
+        second = int(record.created)
+        last_second, last_time = self._last
+        if second != last_second:
+            last_time = time.strftime(datefmt, self.converter(second))
+            self._last = (second, last_time)
+        return last_time
+
+
+class ColoredFormatter(CachedTimeFormatter):
     """Formateador personalizado con colores para consola."""
     
-    COLORS = {
-        'DEBUG': Fore.CYAN,
-        'INFO': Fore.GREEN,
-        'WARNING': Fore.YELLOW,
-        'ERROR': Fore.RED,
-        'CRITICAL': Fore.RED + Style.BRIGHT,
-    }
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Nombre de nivel ya coloreado; se calcula en el primer format() (así
+        # colorama no se importa hasta que se registra algo en consola)
+        self._colored = None
+    
+    @staticmethod
+    def _build_colored():
+        colorama = _colorama()
+        Fore, Style = colorama.Fore, colorama.Style
+        colors = {
+            'DEBUG': Fore.CYAN,
+            'INFO': Fore.GREEN,
+            'WARNING': Fore.YELLOW,
+            'ERROR': Fore.RED,
+            'CRITICAL': Fore.RED + Style.BRIGHT,
+        }
+        return {level: f"{color}{level}{Style.RESET_ALL}" for level, color in colors.items()}
     
     def format(self, record):
-        log_color = self.COLORS.get(record.levelname, '')
-        record.levelname = f"{log_color}{record.levelname}{Style.RESET_ALL}"
-        return super().format(record)
+        colored = self._colored
+        if colored is None:
+            colored = self._colored = self._build_colored()
+        # Se restaura levelname: otros handlers pueden formatear el mismo registro
+        levelname = record.levelname
+        record.levelname = colored.get(levelname, levelname)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
 
 
+@lru_cache(maxsize=None)
+def _get_log_queue(log_file: str) -> queue.Queue:
+    """
+    Crea la cola del archivo de log y arranca su QueueListener (una vez por archivo).
+    
+    El listener escribe en el archivo desde un hilo en segundo plano, de modo
+    que el hilo que registra solo hace un `queue.put` en memoria.
+    
+    Args:
+        log_file: Ruta del archivo de log
+        
+    Returns:
+        queue.Queue: Cola a la que se conectan los QueueHandler
+    """
+    # Handler para archivo (sin colores)
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(CachedTimeFormatter(LOG_FORMAT, DATE_FORMAT))
+    
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    # Vaciar la cola antes de terminar el proceso
+    atexit.register(listener.stop)
+    
+    return log_queue
+
+
+class ColoredStreamHandler(logging.StreamHandler):
+    """Handler de stderr que inicializa colorama al emitir el primer registro."""
+    
+    def __init__(self):
+        super().__init__()
+        self._colorama_ready = False
+    
+    def emit(self, record):
+        if not self._colorama_ready:
+            _colorama()
+            # colorama.init() envuelve sys.stderr: escribir en el envoltorio
+            self.setStream(sys.stderr)
+            self._colorama_ready = True
+        super().emit(record)
+
+
+@lru_cache(maxsize=None)
+def _get_console_handler() -> logging.Handler:
+    """
+    Crea el handler de consola con colores (compartido por todos los loggers).
+    
+    Escribe de forma síncrona en el hilo que registra: así los mensajes salen
+    en orden respecto a lo que el programa imprime en stdout.
+    
+    Returns:
+        logging.Handler: Handler de consola
+    """
+    console_handler = ColoredStreamHandler()
+    console_handler.setFormatter(ColoredFormatter(LOG_FORMAT, DATE_FORMAT))
+    return console_handler
+
+
+@lru_cache(maxsize=None)
 def setup_logger(name: str, log_file: str = None, level: str = 'INFO'):
     """
-    Configura y retorna un logger.
+    Configura y retorna un logger (con caché por nombre, archivo y nivel).
+    
+    La consola se escribe directamente; el archivo, en segundo plano (ver _get_log_queue).
     
     Args:
         name: Nombre del logger
@@ -47,20 +172,8 @@ def setup_logger(name: str, log_file: str = None, level: str = 'INFO'):
     if logger.handlers:
         return logger
     
-    # Formato
-    fmt = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    date_fmt = '%Y-%m-%d %H:%M:%S'
-    
-    # Handler para consola con colores
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(ColoredFormatter(fmt, date_fmt))
-    logger.addHandler(console_handler)
-    
-    # Handler para archivo (sin colores)
+    logger.addHandler(_get_console_handler())
     if log_file:
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setFormatter(logging.Formatter(fmt, date_fmt))
-        logger.addHandler(file_handler)
+        logger.addHandler(QueueHandler(_get_log_queue(log_file)))
     
     return logger
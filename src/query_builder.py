@@ -2,89 +2,507 @@
 Módulo de consultas a Elasticsearch
 Implementa diferentes tipos de búsquedas usando Query DSL.
 """
-from typing import List, Dict, Any, Optional
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache, wraps
+from itertools import islice
+from operator import itemgetter
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple, Union
+import orjson
 from elasticsearch import Elasticsearch
 from src.config import Config
+from src.elasticsearch_client import ElasticsearchClient
 from src.logger import setup_logger
 
 logger = setup_logger(__name__, Config.LOG_FILE, Config.LOG_LEVEL)
 
 
+@lru_cache(maxsize=None)
+def _warn_large_window() -> None:
+    """Avisa (una sola vez por proceso) de que los tamaños grandes se paginan con scan()."""
+    logger.warning(
+        "size supera MAX_RESULT_WINDOW (%d): se usa scan() con Point-In-Time",
+        Config.MAX_RESULT_WINDOW
+    )
+
+
+# Condiciones de un range según qué límites se indiquen: (gte es None, lte es None)
+_RANGE_SHAPES = {
+    (False, False): lambda gte, lte: {"gte": gte, "lte": lte},
+    (True, False): lambda _, lte: {"lte": lte},
+    (False, True): lambda gte, _: {"gte": gte},
+    (True, True): lambda *_: {},
+}
+
+# Script field con la longitud de 'texto' que acompaña a la vista previa
+_PREVIEW_LENGTH = 'texto_length'
+
+# Accesores de los hits (itemgetter resuelve las claves en C)
+_HIT_ID = itemgetter('_id')
+_HIT_ID_SCORE = itemgetter('_id', '_score')
+
+
+def _logged(name: str):
+    """
+    Decorador: registra el error de una consulta y lo vuelve a lanzar.
+    
+    Args:
+        name: Nombre de la consulta para el log
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            except Exception as e:
+                logger.error("Error en %s: %s", name, e)
+                raise
+        return wrapper
+    return decorator
+
+
+def _apply_source(query: Dict[str, Any], source_fields: Optional[List[str]] = None,
+                  need_body: bool = True) -> Dict[str, Any]:
+    """
+    Fija el `_source` de una consulta.
+    
+    Args:
+        query: Cuerpo de la consulta (se modifica)
+        source_fields: Campos a incluir; se ordenan, así la misma lista
+            produce siempre el mismo cuerpo (y la misma clave de caché)
+        need_body: Si es False no se pide `_source` (solo IDs)
+        
+    Returns:
+        dict: El mismo cuerpo de consulta
+    """
+    if not need_body:
+        query["_source"] = False
+    elif source_fields:
+        query["_source"] = {"includes": sorted(source_fields)}
+    return query
+
+
+def _clause_key(clause: Dict[str, Any]) -> bytes:
+    """Clave de orden estable de una cláusula (independiente del orden de sus claves)."""
+    return orjson.dumps(clause, option=orjson.OPT_SORT_KEYS)
+
+
+def _add_highlight(result: Dict[str, Any], hit: Dict[str, Any]) -> None:
+    """Copia al resultado la vista previa del hit (highlight y longitud del texto)."""
+    result['highlight'] = hit['highlight']
+    fields = hit.get('fields')
+    if fields and _PREVIEW_LENGTH in fields:
+        result['text_length'] = fields[_PREVIEW_LENGTH][0]
+
+
+@dataclass
+class CanonicalQuery:
+    """
+    Consulta bool en forma canónica.
+    
+    Ordena las cláusulas de must/filter/should: el orden no cambia los
+    resultados ni el score (must y should suman, filter no puntúa), así que
+    dos consultas equivalentes producen el mismo cuerpo y aciertan en la
+    misma entrada de caché (la de QueryBuilder y la request cache de
+    Elasticsearch, que compara el cuerpo byte a byte).
+    """
+    must: List[Dict[str, Any]] = field(default_factory=list)
+    filters: List[Dict[str, Any]] = field(default_factory=list)
+    should: List[Dict[str, Any]] = field(default_factory=list)
+    
+    def to_body(self) -> Dict[str, Any]:
+        """
+        Genera el cuerpo de la consulta con las cláusulas ordenadas.
+        
+        Returns:
+            dict: Cuerpo {"query": {"bool": ...}}
+        """
+        bool_conditions = {}
+        for name, clauses in (("must", self.must), ("filter", self.filters), ("should", self.should)):
+            if clauses:
+                bool_conditions[name] = sorted(clauses, key=_clause_key)
+        return {"query": {"bool": bool_conditions}}
+
+
 class QueryBuilder:
     """Constructor de consultas para Elasticsearch."""
     
-    def __init__(self, es_client: Elasticsearch):
+    # Atributos fijos: sin __dict__ por instancia
+    __slots__ = ('es', 'index_name', 'preference', '_cache', '_cache_lock')
+    
+    # Vista previa del texto generada por Elasticsearch (evita enviar el texto completo).
+    # Es una plantilla: cada cuerpo recibe su propia copia
+    PREVIEW_HIGHLIGHT = {
+        "pre_tags": [""],
+        "post_tags": [""],
+        "fields": {
+            "texto": {"fragment_size": 100, "number_of_fragments": 1, "no_match_size": 100}
+        }
+    }
+    # Longitud de 'texto' calculada en el servidor (sin descargar el texto): permite
+    # saber si el fragmento de la vista previa está recortado
+    PREVIEW_SCRIPT_FIELDS = {
+        _PREVIEW_LENGTH: {
+            "script": {
+                "source": "def t = params['_source']['texto']; return t == null ? 0 : t.trim().length();"
+            }
+        }
+    }
+    
+    def __init__(self, es_client: Optional[Elasticsearch] = None, preference: Optional[str] = None):
         """
         Inicializa el constructor de consultas.
         
         Args:
-            es_client: Cliente de Elasticsearch conectado
+            es_client: Cliente de Elasticsearch conectado (por defecto, el
+                compartido por el proceso; ver ElasticsearchClient.instance)
+            preference: Preferencia de shards de las búsquedas (por defecto,
+                Config.ES_PREFERENCE). Con "session_<usuario>" las consultas
+                repetidas de un usuario caen en las mismas copias y
+                aprovechan su request cache.
         """
-        self.es = es_client
+        self.es = es_client or ElasticsearchClient.instance().get_client()
         self.index_name = Config.INDEX_NAME
+        self.preference = preference if preference is not None else Config.ES_PREFERENCE
+        # clave de la consulta -> (instante, resultados); orden LRU
+        self._cache: 'OrderedDict[bytes, Tuple[float, List[Dict[str, Any]]]]' = OrderedDict()
+        # El constructor se comparte entre hilos: la caché se modifica bajo este lock
+        self._cache_lock = threading.Lock()
+    
+    def clear_cache(self) -> None:
+        """
+        Vacía la caché de resultados.
+        
+        La caché no detecta escrituras en el índice: sin esta llamada, las
+        consultas repetidas tras indexar devuelven datos antiguos durante
+        Config.QUERY_CACHE_TTL segundos.
+        """
+        with self._cache_lock:
+            self._cache.clear()
+    
+    # Cuerpos de consulta (Query DSL): los usan los métodos de búsqueda y msearch()
+    
+    @classmethod
+    def match_all_body(cls, size: int = 100) -> Dict[str, Any]:
+        """Cuerpo de la consulta match_all."""
+        return {"query": {"match_all": {}}, "size": size}
+    
+    @classmethod
+    def term_body(cls, field: str, value: Any) -> Dict[str, Any]:
+        """Cuerpo de la consulta term (búsqueda exacta, en contexto filter: sin score)."""
+        return {
+            "query": {
+                "bool": {"filter": [{"term": {field: value}}]}
+            }
+        }
+    
+    @classmethod
+    def match_body(cls, field: str, text: str, source_fields: Optional[List[str]] = None,
+                   preview: bool = False) -> Dict[str, Any]:
+        """Cuerpo de la consulta match (con vista previa opcional de 'texto')."""
+        query = {
+            "query": {"match": {field: text}}
+        }
+        
+        _apply_source(query, source_fields)
+        
+        if preview:
+            cls._apply_preview(query)
+        
+        return query
+    
+    @classmethod
+    def _apply_preview(cls, query: Dict[str, Any]) -> None:
+        """Añade a la consulta la vista previa de 'texto' (copias de las plantillas)."""
+        query["highlight"] = copy.deepcopy(cls.PREVIEW_HIGHLIGHT)
+        query["script_fields"] = copy.deepcopy(cls.PREVIEW_SCRIPT_FIELDS)
+        # Con script_fields Elasticsearch omite `_source` si no se pide explícitamente
+        query.setdefault("_source", True)
+    
+    @classmethod
+    def range_body(cls, field: str, gte: Optional[str] = None, lte: Optional[str] = None,
+                   source_fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Cuerpo de la consulta range (en contexto filter: sin score)."""
+        range_conditions = _RANGE_SHAPES[(gte is None, lte is None)](gte, lte)
+        
+        # Contexto filter: no se calcula score y la consulta es cacheable
+        query = {
+            "query": {"bool": {"filter": [{"range": {field: range_conditions}}]}}
+        }
+        
+        _apply_source(query, source_fields)
+        
+        return query
+    
+    @classmethod
+    def bool_body(cls, must: Optional[List[Dict]] = None, filter_terms: Optional[List[Dict]] = None,
+                  should: Optional[List[Dict]] = None, source_fields: Optional[List[str]] = None,
+                  preview: bool = False) -> Dict[str, Any]:
+        """Cuerpo de la consulta bool en forma canónica (con vista previa opcional de 'texto')."""
+        query = CanonicalQuery(must or [], filter_terms or [], should or []).to_body()
+        
+        _apply_source(query, source_fields)
+        
+        if preview:
+            cls._apply_preview(query)
+        
+        return query
+    
+    @classmethod
+    def aggregation_body(cls, agg_field: str, agg_name: str = "aggregation") -> Dict[str, Any]:
+        """Cuerpo de una agregación terms sin documentos (size=0)."""
+        return {
+            "size": 0,  # No necesitamos documentos, solo agregaciones
+            "aggs": {
+                agg_name: {
+                    "terms": {"field": agg_field}
+                }
+            }
+        }
+    
+    @classmethod
+    def multi_match_body(cls, text: str, fields: List[str],
+                         source_fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Cuerpo de la consulta multi_match."""
+        query = {
+            "query": {
+                "multi_match": {
+                    "query": text,
+                    "fields": fields
+                }
+            }
+        }
+        
+        _apply_source(query, source_fields)
+        
+        return query
+    
+    # Consultas hoja que Elasticsearch cachea bien en contexto filter
+    _FILTER_LEAVES = frozenset(("term", "terms", "range", "exists", "prefix"))
+    
+    @classmethod
+    def _is_filter_only(cls, query: Dict[str, Any]) -> bool:
+        """
+        Indica si la consulta solo filtra (no necesita score).
+        
+        Es el caso de una hoja term/range/... o de un bool cuyas únicas cláusulas
+        son `filter`/`must_not` con esas hojas. Sus respuestas son las que mejor
+        aprovecha la shard request cache.
+        
+        Args:
+            query: Cuerpo de la consulta
+            
+        Returns:
+            bool: True si la consulta es solo de filtro
+        """
+        clause = query.get("query")
+        if not isinstance(clause, dict) or len(clause) != 1:
+            return False
+        
+        (kind, spec), = clause.items()
+        if kind in cls._FILTER_LEAVES:
+            return True
+        if kind != "bool" or not spec or not set(spec) <= {"filter", "must_not"}:
+            return False
+        
+        for key in spec:
+            conditions = spec[key]
+            if isinstance(conditions, dict):
+                conditions = [conditions]
+            for condition in conditions:
+                if len(condition) != 1 or next(iter(condition)) not in cls._FILTER_LEAVES:
+                    return False
+        return True
+    
+    @classmethod
+    def _has_relevance(cls, query: Dict[str, Any]) -> bool:
+        """
+        Indica si el score de la consulta aporta información (relevancia).
+        
+        No la aporta en las consultas solo de filtro (score 0) ni en match_all
+        (score constante); son las que los métodos de búsqueda devuelven sin score.
+        
+        Args:
+            query: Cuerpo de la consulta
+            
+        Returns:
+            bool: True si conviene incluir el score en los resultados
+        """
+        clause = query.get("query")
+        if not isinstance(clause, dict) or "match_all" in clause:
+            return False
+        return not cls._is_filter_only(query)
     
-    def _execute_query(self, query: Dict[str, Any], query_name: str, include_score: bool = False) -> List[Dict[str, Any]]:
+    def _execute_query(self, query: Dict[str, Any], query_name: str, include_score: bool = False,
+                       request_cache: Optional[bool] = None, stream: bool = False,
+                       preference: Optional[str] = None) -> Union[List[Dict[str, Any]], Iterator[Dict[str, Any]]]:
         """
         Método base para ejecutar cualquier consulta (elimina duplicación de código).
         
+        Los resultados se guardan en caché durante Config.QUERY_CACHE_TTL segundos
+        (hasta Config.QUERY_CACHE_MAX consultas); clear_cache() la vacía.
+        
         Args:
             query: Consulta de Elasticsearch
             query_name: Nombre de la consulta para logging
             include_score: Si incluir el score de relevancia
+            request_cache: Si usar la shard request cache de Elasticsearch
+                (None: se activa automáticamente para consultas solo de filtro)
+            stream: Si devolver un generador en lugar de una lista (los documentos
+                se formatean a medida que se consumen y no se guardan en caché)
+            preference: Preferencia de shards de esta búsqueda (None: la del constructor)
             
         Returns:
-            list: Lista de documentos encontrados
+            list: Lista de documentos encontrados (o un iterador si stream=True)
         """
+        # Caché LRU+TTL: la misma consulta repetida no vuelve a Elasticsearch.
+        # Claves ordenadas: las cláusulas que pasa el llamador pueden traer sus
+        # claves en cualquier orden
+        key = self.index_name.encode() + orjson.dumps(query, option=orjson.OPT_SORT_KEYS) + (
+            b'+score' if include_score else b''
+        )
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None and now - cached[0] < Config.QUERY_CACHE_TTL:
+                self._cache.move_to_end(key)
+            else:
+                cached = None
+        if cached is not None:
+            logger.info("✓ %s servida desde caché (%d documentos)", query_name, len(cached[1]))
+            # Copia profunda: el llamador puede modificar los documentos devueltos
+            results = copy.deepcopy(cached[1])
+            return iter(results) if stream else results
+        
         try:
             logger.info("Ejecutando %s...", query_name)
-            response = self.es.search(index=self.index_name, body=query)
+            if request_cache is None:
+                request_cache = self._is_filter_only(query)
+            # Solo se envía si es True: con False se ignoraría la configuración del índice
+            params = {'request_cache': True} if request_cache else {}
+            preference = preference or self.preference
+            if preference:
+                params['preference'] = preference
+            
+            # Sin conteo total: Lucene puede cortar la recolección al llenar `size`
+            response = self.es.search(index=self.index_name, body=query, track_total_hits=False, **params)
             
             hits = response['hits']['hits']
-            total = response['hits']['total']['value']
             
-            logger.info("✓ Encontrados %d documentos", total)
+            logger.info("✓ Encontrados %d documentos", len(hits))
+            
+            if stream:
+                return self._iter_results(hits, include_score)
             
-            return self._format_results(hits, include_score)
+            results = self._format_results(hits, include_score)
+            
+            if Config.QUERY_CACHE_MAX > 0:
+                # Se guarda una copia propia: la lista devuelta es del llamador
+                cached_results = copy.deepcopy(results)
+                with self._cache_lock:
+                    self._cache[key] = (now, cached_results)
+                    self._cache.move_to_end(key)
+                    if len(self._cache) > Config.QUERY_CACHE_MAX:
+                        self._cache.popitem(last=False)
+            
+            return results
             
         except Exception as e:
             logger.error("Error en %s: %s", query_name, e)
             raise
     
-    def match_all(self, size: int = 100) -> List[Dict[str, Any]]:
+    def scan(self, query: Dict[str, Any], page_size: int = 1000,
+             keep_alive: str = "1m") -> Iterator[Dict[str, Any]]:
+        """
+        Recorre todos los resultados de una consulta con Point-In-Time + search_after.
+        
+        A diferencia de from+size no está limitado por index.max_result_window y
+        solo mantiene en memoria una página de resultados.
+        
+        Args:
+            query: Cuerpo de la consulta (sin size/sort; se fijan aquí)
+            page_size: Documentos por página
+            keep_alive: Tiempo de vida del PIT entre páginas
+            
+        Yields:
+            dict: Documento formateado ({'id', 'data'})
+        """
+        pit_id = self.es.open_point_in_time(index=self.index_name, keep_alive=keep_alive)['id']
+        try:
+            logger.info("Recorriendo resultados con PIT (páginas de %d)...", page_size)
+            search_after = None
+            while True:
+                body = {
+                    **query,
+                    "size": page_size,
+                    "pit": {"id": pit_id, "keep_alive": keep_alive},
+                    # _shard_doc: el orden más barato y estable para paginar un PIT
+                    "sort": [{"_shard_doc": "asc"}],
+                    "track_total_hits": False
+                }
+                if search_after is not None:
+                    body["search_after"] = search_after
+                
+                response = self.es.search(body=body)
+                hits = response['hits']['hits']
+                if not hits:
+                    break
+                
+                yield from self._iter_results(hits)
+                
+                # El id del PIT puede cambiar entre respuestas
+                pit_id = response.get('pit_id', pit_id)
+                search_after = hits[-1]['sort']
+        finally:
+            self.es.close_point_in_time(id=pit_id)
+    
+    def match_all(self, size: int = 100,
+                  stream: bool = False) -> Union[List[Dict[str, Any]], Iterator[Dict[str, Any]]]:
         """
         Consulta que devuelve todos los documentos.
         
+        Por encima de Config.MAX_RESULT_WINDOW Elasticsearch rechazaría la búsqueda,
+        así que los documentos se recorren directamente con scan().
+        
         Args:
             size: Número máximo de documentos a devolver
+            stream: Si devolver un iterador en lugar de una lista (con scan() nunca
+                se materializan todos los documentos a la vez)
             
         Returns:
-            list: Lista de documentos encontrados
+            list: Lista de documentos encontrados (o un iterador si stream=True)
         """
-        query = {
-            "query": {"match_all": {}},
-            "size": size
-        }
-        return self._execute_query(query, f"Match All (max {size} docs)")
+        if size > Config.MAX_RESULT_WINDOW:
+            _warn_large_window()
+            documents = islice(self.scan({"query": {"match_all": {}}}), size)
+            return documents if stream else list(documents)
+        return self._execute_query(self.match_all_body(size), f"Match All (max {size} docs)",
+                                   stream=stream)
     
-    def term_query(self, field: str, value: Any) -> List[Dict[str, Any]]:
+    def term_query(self, field: str, value: Any, fields_only: bool = False) -> List[Any]:
         """
         Búsqueda exacta de un término en un campo específico.
         
         Args:
             field: Campo donde buscar
             value: Valor exacto a buscar
+            fields_only: Si devolver solo los IDs (no se transfiere `_source`)
             
         Returns:
-            list: Lista de documentos encontrados
+            list: Lista de documentos encontrados (o de IDs si fields_only=True)
         """
-        query = {
-            "query": {
-                "term": {field: value}
-            }
-        }
+        query = self.term_body(field, value)
+        if fields_only:
+            _apply_source(query, need_body=False)
+            return [r['id'] for r in self._execute_query(query, f"Term Query (IDs): {field}='{value}'")]
         return self._execute_query(query, f"Term Query: {field}='{value}'")
     
-    def match_query(self, field: str, text: str, source_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    def match_query(self, field: str, text: str, source_fields: Optional[List[str]] = None,
+                    preview: bool = False, fields_only: bool = False) -> List[Any]:
         """
         Búsqueda dinámica con análisis lingüístico (relevancia).
         
@@ -92,17 +510,19 @@ class QueryBuilder:
             field: Campo donde buscar
             text: Texto a buscar
             source_fields: Campos a incluir en los resultados
+            preview: Si incluir una vista previa de 'texto' (clave 'highlight')
+            fields_only: Si devolver solo los IDs ordenados por relevancia
+                (no se transfiere `_source`)
             
         Returns:
             list: Lista de documentos encontrados con score de relevancia
+                (o de IDs si fields_only=True)
         """
-        query = {
-            "query": {"match": {field: text}}
-        }
-        
-        if source_fields:
-            query["_source"] = source_fields
+        if fields_only:
+            query = _apply_source(self.match_body(field, text), need_body=False)
+            return [r['id'] for r in self._execute_query(query, f"Match Query (IDs): {field}='{text}'")]
         
+        query = self.match_body(field, text, source_fields, preview)
         return self._execute_query(query, f"Match Query: {field}='{text}'", include_score=True)
     
     def range_query(self, field: str, gte: Optional[str] = None, lte: Optional[str] = None, 
@@ -119,23 +539,12 @@ class QueryBuilder:
         Returns:
             list: Lista de documentos encontrados
         """
-        range_conditions = {}
-        if gte:
-            range_conditions["gte"] = gte
-        if lte:
-            range_conditions["lte"] = lte
-        
-        query = {
-            "query": {"range": {field: range_conditions}}
-        }
-        
-        if source_fields:
-            query["_source"] = source_fields
-        
+        query = self.range_body(field, gte, lte, source_fields)
         return self._execute_query(query, f"Range Query: {field} [{gte} - {lte}]")
     
     def bool_query(self, must: Optional[List[Dict]] = None, filter_terms: Optional[List[Dict]] = None, 
-                  should: Optional[List[Dict]] = None, source_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+                  should: Optional[List[Dict]] = None, source_fields: Optional[List[str]] = None,
+                  preview: bool = False) -> List[Dict[str, Any]]:
         """
         Búsqueda booleana compuesta (combina múltiples condiciones).
         
@@ -144,28 +553,15 @@ class QueryBuilder:
             filter_terms: Condiciones de filtro (no afectan score)
             should: Condiciones que DEBERÍAN cumplirse (opcionales)
             source_fields: Campos a incluir en los resultados
+            preview: Si incluir una vista previa de 'texto' (clave 'highlight')
             
         Returns:
             list: Lista de documentos encontrados
         """
-        bool_conditions = {}
-        
-        if must:
-            bool_conditions["must"] = must
-        if filter_terms:
-            bool_conditions["filter"] = filter_terms
-        if should:
-            bool_conditions["should"] = should
-        
-        query = {
-            "query": {"bool": bool_conditions}
-        }
-        
-        if source_fields:
-            query["_source"] = source_fields
-        
+        query = self.bool_body(must, filter_terms, should, source_fields, preview)
         return self._execute_query(query, "Bool Query (consulta compuesta)", include_score=True)
     
+    @_logged("Aggregation Query")
     def aggregation_query(self, agg_field: str, agg_name: str = "aggregation") -> List[Dict[str, Any]]:
         """
         Consulta con agregaciones (para crear filtros y estadísticas).
@@ -177,36 +573,26 @@ class QueryBuilder:
         Returns:
             list: Resultados de la agregación
         """
-        try:
-            query = {
-                "size": 0,  # No necesitamos documentos, solo agregaciones
-                "aggs": {
-                    agg_name: {
-                        "terms": {"field": agg_field}
-                    }
-                }
-            }
-            
-            logger.info("Ejecutando Aggregation Query: campo '%s'", agg_field)
-            response = self.es.search(index=self.index_name, body=query)
-            
-            buckets = response['aggregations'][agg_name]['buckets']
-            
-            logger.info("✓ Agregación completada: %d categorías", len(buckets))
-            
-            results = [
-                {'key': bucket['key'], 'count': bucket['doc_count']}
-                for bucket in buckets
-            ]
-            
-            for result in results:
-                logger.info("  - %s: %d documentos", result['key'], result['count'])
-            
-            return results
-            
-        except Exception as e:
-            logger.error("Error en Aggregation Query: %s", e)
-            raise
+        query = self.aggregation_body(agg_field, agg_name)
+        
+        logger.info("Ejecutando Aggregation Query: campo '%s'", agg_field)
+        # Con size=0 la respuesta puede servirse desde la shard request cache
+        params = {'preference': self.preference} if self.preference else {}
+        response = self.es.search(index=self.index_name, body=query, request_cache=True, **params)
+        
+        buckets = response['aggregations'][agg_name]['buckets']
+        
+        logger.info("✓ Agregación completada: %d categorías", len(buckets))
+        
+        results = self._format_buckets(buckets)
+        
+        # Un único registro con el detalle (y solo en DEBUG), no uno por bucket
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Buckets de '%s':\n%s", agg_field, "\n".join(
+                f"  - {result['key']}: {result['count']} documentos" for result in results
+            ))
+        
+        return results
     
     def multi_match_query(self, text: str, fields: List[str], source_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
@@ -220,23 +606,151 @@ class QueryBuilder:
         Returns:
             list: Lista de documentos encontrados
         """
-        query = {
-            "query": {
-                "multi_match": {
-                    "query": text,
-                    "fields": fields
-                }
-            }
-        }
+        query = self.multi_match_body(text, fields, source_fields)
+        return self._execute_query(query, f"Multi Match Query: '{text}' en {fields}", include_score=True)
+    
+    @_logged("Multi Search")
+    def msearch(self, searches: List[Dict[str, Any]],
+                include_score: Union[bool, Sequence[bool], None] = None,
+                request_cache: Optional[bool] = None,
+                preference: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Ejecuta varias consultas en una sola petición HTTP (_msearch).
         
-        if source_fields:
-            query["_source"] = source_fields
+        Sirve para fusionar el abanico de consultas de un dashboard (resultados,
+        facetas, rangos...) en un único viaje de red.
         
-        return self._execute_query(query, f"Multi Match Query: '{text}' en {fields}", include_score=True)
+        Args:
+            searches: Cuerpos de consulta (por ejemplo, los de los métodos *_body)
+            include_score: Si incluir el score de relevancia en los documentos: un
+                valor para todas las consultas o uno por consulta (alineado con
+                `searches`). None: solo en las consultas con relevancia (no en
+                match_all ni en las de filtro), igual que los métodos de búsqueda
+            request_cache: Si usar la shard request cache en todas las consultas
+                (None: solo en las de filtro y en las agregaciones con size=0)
+            preference: Preferencia de shards de las consultas (None: la del constructor)
+            
+        Returns:
+            list: Una lista de resultados por consulta, en el mismo orden. Para las
+                consultas con agregaciones se devuelven los buckets de la agregación
+                ({'key', 'count'}), igual que en aggregation_query.
+                
+        Raises:
+            RuntimeError: Si alguna de las consultas falla en Elasticsearch
+        """
+        logger.info("Ejecutando Multi Search (%d consultas)...", len(searches))
+        
+        if include_score is None:
+            scores = [self._has_relevance(search) for search in searches]
+        elif isinstance(include_score, bool):
+            scores = [include_score] * len(searches)
+        else:
+            scores = list(include_score)
+            if len(scores) != len(searches):
+                raise ValueError("include_score debe tener un valor por consulta")
+        
+        preference = preference or self.preference
+        body = []
+        for search in searches:
+            header = {"index": self.index_name}
+            if preference:
+                header["preference"] = preference
+            use_cache = request_cache
+            if use_cache is None:
+                use_cache = search.get("size") == 0 or self._is_filter_only(search)
+            if use_cache:
+                header["request_cache"] = True
+            body.append(header)
+            body.append({"track_total_hits": False, **search})
+        
+        response = self.es.msearch(searches=body)
+        
+        results = []
+        for item, score in zip(response['responses'], scores):
+            if 'error' in item:
+                raise RuntimeError(f"Consulta fallida en msearch: {item['error']}")
+            if 'aggregations' in item:
+                aggregation = next(iter(item['aggregations'].values()))
+                results.append(self._format_buckets(aggregation['buckets']))
+            else:
+                results.append(self._format_results(item['hits']['hits'], score))
+        
+        logger.info("✓ Multi Search completada: %d respuestas", len(results))
+        return results
+    
+    @_logged("Warmup")
+    def warm(self, searches: List[Dict[str, Any]], preference: Optional[str] = None) -> None:
+        """
+        Precalienta la shard request cache con las consultas más frecuentes.
+        
+        Pensado para llamarse justo después de un refresh (p. ej. al terminar una
+        carga masiva): las consultas se lanzan en un solo _msearch con
+        request_cache=True y las primeras búsquedas de los usuarios ya encuentran
+        la caché caliente. Conviene usar la misma preferencia de shards que las
+        lecturas posteriores para que calienten las mismas copias.
+        
+        Args:
+            searches: Cuerpos de consulta a precalentar (p. ej. los de los métodos *_body)
+            preference: Preferencia de shards (None: la del constructor)
+        """
+        if not searches:
+            return
+        self.msearch(searches, request_cache=True, preference=preference)
+        logger.info("✓ Request cache precalentada con %d consultas", len(searches))
+    
+    @staticmethod
+    def preview_text(result: Dict[str, Any]) -> Optional[str]:
+        """
+        Texto de la vista previa de un resultado, con "..." solo si está recortado.
+        
+        Args:
+            result: Documento formateado de una consulta con preview=True
+            
+        Returns:
+            str: Fragmento de 'texto' (None si el resultado no trae vista previa)
+        """
+        fragments = result.get('highlight', {}).get('texto')
+        if not fragments:
+            return None
+        fragment = fragments[0]
+        length = result.get('text_length')
+        if length is None:
+            # Sin script field: comparar con el texto si viene en `_source`
+            length = len(result['data'].get('texto', '').strip())
+        return fragment + "..." if len(fragment) < length else fragment
+    
+    @staticmethod
+    def _iter_results(hits: Iterable[Dict], include_score: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Formatea los resultados de una consulta bajo demanda (generador).
+        
+        Args:
+            hits: Resultados de Elasticsearch
+            include_score: Si incluir el score de relevancia
+            
+        Yields:
+            dict: Documento formateado
+        """
+        # El getter y la rama de score se resuelven una vez, fuera del bucle
+        if include_score:
+            for hit in hits:
+                hit_id, score = _HIT_ID_SCORE(hit)
+                # Sin `_source` cuando la consulta solo pide IDs
+                result = {'id': hit_id, 'data': hit.get('_source', {}), 'score': score}
+                if 'highlight' in hit:
+                    _add_highlight(result, hit)
+                yield result
+        else:
+            for hit in hits:
+                result = {'id': _HIT_ID(hit), 'data': hit.get('_source', {})}
+                if 'highlight' in hit:
+                    _add_highlight(result, hit)
+                yield result
     
-    def _format_results(self, hits: List[Dict], include_score: bool = False) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _format_results(hits: List[Dict], include_score: bool = False) -> List[Dict[str, Any]]:
         """
-        Formatea los resultados de una consulta.
+        Formatea los resultados de una consulta como lista.
         
         Args:
             hits: Resultados de Elasticsearch
@@ -245,14 +759,20 @@ class QueryBuilder:
         Returns:
             list: Lista de documentos formateados
         """
-        results = []
-        for hit in hits:
-            result = {
-                'id': hit['_id'],
-                'data': hit['_source']
-            }
-            if include_score:
-                result['score'] = hit['_score']
-            results.append(result)
+        return list(QueryBuilder._iter_results(hits, include_score))
+    
+    @staticmethod
+    def _format_buckets(buckets: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Formatea los buckets de una agregación terms.
         
-        return results
+        Args:
+            buckets: Buckets devueltos por Elasticsearch
+            
+        Returns:
+            list: Lista de {'key', 'count'}
+        """
+        return [
+            {'key': bucket['key'], 'count': bucket['doc_count']}
+            for bucket in buckets
+        ]
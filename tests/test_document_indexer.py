@@ -0,0 +1,18 @@
+"""
+Pruebas de la validación de documentos de DocumentIndexer (sin servidor Elasticsearch).
+"""
+import pytest
+from src.document_indexer import DocumentIndexer
+
+BASE = {"autor": "Ana", "tipo_documento": "terror", "texto": "..."}
+
+
+@pytest.mark.parametrize("fecha", ["2024-02-31", "2023-02-29", "2024-04-31", "2024-13-01", "2024-4-10"])
+def test_rechaza_fechas_imposibles_o_mal_formadas(fecha):
+    with pytest.raises(ValueError):
+        DocumentIndexer(None).validate_documents([{**BASE, "fecha": fecha}])
+
+
+def test_acepta_fechas_validas():
+    documents = [{**BASE, "fecha": "2024-02-29"}, {**BASE, "fecha": "2024-12-31"}]
+    assert DocumentIndexer(None).validate_documents(documents)
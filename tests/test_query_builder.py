@@ -0,0 +1,65 @@
+"""
+Pruebas de QueryBuilder con un cliente simulado (sin servidor Elasticsearch).
+"""
+from src.query_builder import QueryBuilder
+
+
+class FakeElasticsearch:
+    """Cliente mínimo: cuenta las búsquedas y devuelve siempre los mismos hits."""
+
+    def __init__(self):
+        self.searches = 0
+
+    def search(self, **kwargs):
+        self.searches += 1
+        return {'hits': {'hits': [
+            {'_id': '1', '_score': 1.0, '_source': {'autor': 'Ana', 'tipo_documento': 'terror'}}
+        ]}}
+
+
+def test_modificar_resultados_no_altera_la_cache():
+    es = FakeElasticsearch()
+    query = QueryBuilder(es)
+
+    results = query.term_query("tipo_documento", "terror")
+    results[0]['data']['autor'] = 'modificado'
+    results.append({'id': 'extra'})
+
+    again = query.term_query("tipo_documento", "terror")
+    assert es.searches == 1
+    assert again == [{'id': '1', 'data': {'autor': 'Ana', 'tipo_documento': 'terror'}}]
+
+    again[0]['data']['autor'] = 'otra vez'
+    assert query.term_query("tipo_documento", "terror")[0]['data']['autor'] == 'Ana'
+
+
+def test_modificar_un_cuerpo_no_altera_los_siguientes():
+    body = QueryBuilder.match_body("texto", "dragón", source_fields=["autor"], preview=True)
+    body["highlight"]["fields"]["texto"]["fragment_size"] = 1
+    body["_source"]["includes"].append("texto")
+    QueryBuilder.match_all_body()["query"]["match_all"]["boost"] = 2
+
+    fresh = QueryBuilder.match_body("texto", "dragón", source_fields=["autor"], preview=True)
+    assert fresh["highlight"] == QueryBuilder.PREVIEW_HIGHLIGHT
+    assert fresh["highlight"]["fields"]["texto"]["fragment_size"] == 100
+    assert fresh["_source"] == {"includes": ["autor"]}
+    assert QueryBuilder.match_all_body()["query"] == {"match_all": {}}
+
+
+def test_vista_previa_solo_con_puntos_suspensivos_si_esta_recortada():
+    corto = "Un texto breve."
+    largo = "x" * 250
+    hits = [
+        {'_id': '1', '_source': {}, 'highlight': {'texto': [corto]}, 'fields': {'texto_length': [len(corto)]}},
+        {'_id': '2', '_source': {}, 'highlight': {'texto': [largo[:100]]}, 'fields': {'texto_length': [len(largo)]}},
+    ]
+    completo, recortado = QueryBuilder._format_results(hits)
+
+    assert QueryBuilder.preview_text(completo) == corto
+    assert QueryBuilder.preview_text(recortado) == largo[:100] + "..."
+    assert QueryBuilder.preview_text({'id': '3', 'data': {}}) is None
+
+
+def test_la_vista_previa_pide_la_longitud_del_texto():
+    body = QueryBuilder.match_body("texto", "dragón", preview=True)
+    assert 'texto_length' in body["script_fields"]